@@ -1,35 +1,43 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
+from flask_migrate import Migrate
 from backend.models import db
-from backend.bp.auth import auth_bp, login_manager
-from backend.bp.main import main_bp
-from backend.bp.journal import journal_bp
-from backend.bp.analytics import analytics_bp
-from backend.bp.chat import chat_bp
 import os
+import threading
 
 # Import configurations and validation functions
 from backend.config import config
 from backend.utils.env_validation import validate_environment_variables
 from backend.utils.register_error import register_error_handlers
 from backend.utils.security_headers import configure_security_headers
+from backend.utils.cache import init_cache
+from backend.utils.jobs import init_jobs
+from backend.utils.json_provider import ORJSONProvider
 
-# Add rate limiting to control how often a user can make requests to the API
-# This helps protect against abuse and excessive traffic.
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+# Schema migrations live in the top-level migrations/ directory
+migrate = Migrate(directory=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations'))
 
-def setup_rate_limiting(app):
+def setup_rate_limiting(app, auth_bp, analytics_bp, chat_bp, journal_bp):
     """Set up rate limiting with more granular controls."""
+    # Add rate limiting to control how often a user can make requests to the API
+    # This helps protect against abuse and excessive traffic.
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
     
     # Use Redis in production, memory in development
-    storage_uri = os.getenv('REDIS_URL', "memory://")
+    storage_uri = os.getenv('REDIS_URL', app.config['RATELIMIT_STORAGE_URL'])
+    
+    # Each worker process keeps its own in-memory counters, which multiplies the
+    # effective limits by the number of workers, so require shared storage
+    if storage_uri.startswith('memory://') and app.config.get('RATELIMIT_REQUIRE_SHARED_STORAGE'):
+        raise ValueError("REDIS_URL must be set for rate limiting in this configuration")
     
     limiter = Limiter(
         key_func=get_remote_address,
         app=app,
         default_limits=["1000 per day", "100 per hour"],
         storage_uri=storage_uri,
+        strategy=app.config['RATELIMIT_STRATEGY'],
         headers_enabled=True  # Add rate limit headers to responses
     )
     
@@ -48,6 +56,7 @@ def create_app(config_name=None):
     config_name = config_name or os.getenv('FLASK_CONFIG', 'default')
     
     app = Flask(__name__, instance_relative_config=True)
+    app.json = ORJSONProvider(app)
     
     # Load configuration
     app.config.from_object(config[config_name])
@@ -74,8 +83,16 @@ def create_app(config_name=None):
          supports_credentials=True,
          allow_headers=['Content-Type', 'Authorization'])
     
+    # Blueprints are imported here rather than at module level so importing
+    # this module stays cheap until an application is actually created
+    from backend.bp.auth import auth_bp, login_manager
+    from backend.bp.main import main_bp
+    from backend.bp.journal import journal_bp
+    from backend.bp.analytics import analytics_bp
+    from backend.bp.chat import chat_bp
+    
     # Set up rate limiting
-    limiter = setup_rate_limiting(app)
+    limiter = setup_rate_limiting(app, auth_bp, analytics_bp, chat_bp, journal_bp)
     
     # Configure security headers
     configure_security_headers(app)
@@ -87,6 +104,9 @@ def create_app(config_name=None):
     login_manager.session_protection = "strong"
     login_manager.login_message = "Please log in to access this page."
     login_manager.login_message_category = "info"
+    migrate.init_app(app, db)
+    init_cache(app)
+    init_jobs(app)
     
     # Register blueprints
     app.register_blueprint(main_bp)
@@ -98,14 +118,22 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
     
-    # Create database tables
-    with app.app_context():
-        try:
-            db.create_all()
-            app.logger.info("Database tables created successfully")
-        except Exception as e:
-            app.logger.error(f"Failed to create database tables: {e}")
-            raise
+    # The schema is managed by migrations (flask db upgrade); creating tables
+    # at startup is only a convenience for local development and tests
+    if app.config.get('AUTO_CREATE_TABLES'):
+        with app.app_context():
+            try:
+                db.create_all()
+                app.logger.info("Database tables created successfully")
+            except Exception as e:
+                app.logger.error(f"Failed to create database tables: {e}")
+                raise
+    
+    # Optionally load the OCR model in the background so the first image
+    # entry does not wait for it
+    if app.config.get('PRELOAD_OCR'):
+        from backend.bp.journal import get_ocr_reader
+        threading.Thread(target=get_ocr_reader, daemon=True).start()
     
     app.logger.info(f"Application created with {config_name} configuration")
     return app
\ No newline at end of file
@@ -1,128 +1,147 @@
 from backend.models import db, Journal
+from backend.utils.analytics_batch import AnalyticsBatchQueue
+from backend.utils.cache import get_cache
+from backend.utils.jobs import get_job_runner
+from backend.utils.privacy import remove_sensitive_info
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 import os
-import google.generativeai as genai
 import json
-import re
 import hashlib
+from functools import lru_cache
 from datetime import datetime, timedelta
+from sqlalchemy import func, extract
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
-def remove_sensitive_info(text):
-    """Remove potentially sensitive information from text."""
-    if not text:
-        return text
-    
-    # Remove email addresses
-    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
-    
-    # Remove phone numbers (basic patterns)
-    text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-    text = re.sub(r'\b\(\d{3}\)\s?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-    
-    # Remove potential SSN patterns
-    text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]', text)
-    
-    # Remove credit card-like number patterns
-    text = re.sub(r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', '[CARD]', text)
-    
-    # Remove addresses (basic pattern for street numbers and names)
-    text = re.sub(r'\b\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln)\b', '[ADDRESS]', text, flags=re.IGNORECASE)
-    
-    return text.strip()
+# Cache key prefix for background analysis jobs
+ANALYSIS_JOB_PREFIX = "analytics_job"
+
+# Day names indexed by day-of-week number, where 0 is Sunday (SQLite %w / Postgres dow)
+WEEKDAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+def weekday_number(column):
+    """Return a SQL expression for the day of week (0 = Sunday) of a datetime column."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%w', column)
+    return extract('dow', column)
 
 def sanitize_entries_for_ai(entries, max_entries=31):
-    """Enhanced sanitization with better privacy protection."""
+    """Enhanced sanitization with better privacy protection.
+
+    Expects rows from load_analyzable_entries, whose prompt and answer are
+    already truncated in SQL for more conservative text limiting.
+    """
     limited_entries = entries[:max_entries]
     formatted_entries = []
     
     for entry in limited_entries:
-        # More conservative text limiting for privacy
-        prompt = entry.prompt[:50] if entry.prompt else ""
-        answer = entry.answer[:200] if entry.answer else ""
-        
         # Remove potentially sensitive information
-        prompt = remove_sensitive_info(prompt)
-        answer = remove_sensitive_info(answer)
+        prompt = remove_sensitive_info(entry.prompt or "")
+        answer = remove_sensitive_info(entry.answer or "")
         
         # Use relative dates for additional privacy (month-day only)
-        date = entry.created_at.strftime("%m-%d") if hasattr(entry, 'created_at') else "Unknown"
-        
-        # Add modality info for context
-        modality = getattr(entry, 'modality', 'text')
+        created = entry.created_at
+        date = f"{created.month:02d}-{created.day:02d}"
         
         formatted_entries.append(
-            f"Date: {date}, Modality: {modality}, Topic: {prompt}, Content: {answer}"
+            f"Date: {date}, Modality: {entry.modality}, Topic: {prompt}, Content: {answer}"
         )
     
     return "\n\n".join(formatted_entries)
 
-def call_ai_service(sanitized_entries, retries=2):
-    """Enhanced AI service call with retries and better error handling."""
+# Static analysis guidance, sent as the system instruction so that only the
+# entries vary between requests
+_SYSTEM_INSTRUCTION = (
+    "You are a supportive journal analysis assistant. Analyze these journal entries and provide "
+    "encouraging, constructive insights. Focus on positive patterns and growth opportunities.\n\n"
+    "Provide your response in this exact JSON format (no markdown code blocks):\n"
+    "{\n"
+    '  "patterns": ["pattern1", "pattern2", "pattern3"],\n'
+    '  "insights": ["insight1", "insight2"],\n'
+    '  "suggested_prompts": ["prompt1", "prompt2", "prompt3"]\n'
+    "}\n\n"
+    "Guidelines:\n"
+    "- Keep responses encouraging and constructive\n"
+    "- Focus on personal growth and positive developments\n"
+    "- Suggest thoughtful, open-ended prompts for future journaling\n"
+    "- Be specific but not overly personal"
+)
+
+_STRING_LIST = {"type": "ARRAY", "items": {"type": "STRING"}}
+
+# Structured output schema, so the model always returns parseable JSON
+_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "patterns": _STRING_LIST,
+        "insights": _STRING_LIST,
+        "suggested_prompts": _STRING_LIST
+    },
+    "required": ["patterns", "insights", "suggested_prompts"]
+}
+
+_GEN_CFG = {
+    "temperature": 0.3,  # Lower temperature for more consistent JSON
+    "max_output_tokens": 1024,
+    "top_p": 0.8,
+    "response_mime_type": "application/json",
+    "response_schema": _SCHEMA
+}
+
+@lru_cache(maxsize=1)
+def _create_ai_client(api_key):
+    """Build a Gemini client once per API key so its connection pool is reused."""
+    # Imported lazily: the SDK is slow to import and only needed for AI calls
+    # (google-genai; the chat blueprint still uses google-generativeai)
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+def get_ai_client():
+    """Return the Gemini client used by the analytics endpoints."""
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
         raise ValueError("GEMINI_API_KEY environment variable not set")
     
     try:
-        client = genai.Client(api_key=api_key)
+        return _create_ai_client(api_key)
     except Exception as e:
         raise ValueError(f"Failed to initialize AI client: {str(e)}")
+
+def build_analysis_prompt(sanitized_entries):
+    """Build the per-request part of the analysis prompt.
+
+    The static guidance is sent separately as _SYSTEM_INSTRUCTION.
+    """
+    return f"Journal entries to analyze:\n{sanitized_entries}"
+
+def parse_ai_response_text(text):
+    """Parse and validate the JSON text returned by the model.
+
+    Raises:
+        ValueError: If the response is empty
+        json.JSONDecodeError: If the response is not valid JSON
+    """
+    if not text:
+        raise ValueError("Empty response from AI service")
     
-    prompt = (
-        "You are a supportive journal analysis assistant. Analyze these journal entries and provide "
-        "encouraging, constructive insights. Focus on positive patterns and growth opportunities.\n\n"
-        "Provide your response in this exact JSON format (no markdown code blocks):\n"
-        "{\n"
-        '  "patterns": ["pattern1", "pattern2", "pattern3"],\n'
-        '  "insights": ["insight1", "insight2"],\n'
-        '  "suggested_prompts": ["prompt1", "prompt2", "prompt3"]\n'
-        "}\n\n"
-        "Guidelines:\n"
-        "- Keep responses encouraging and constructive\n"
-        "- Focus on personal growth and positive developments\n"
-        "- Suggest thoughtful, open-ended prompts for future journaling\n"
-        "- Be specific but not overly personal\n\n"
-        f"Journal entries to analyze:\n{sanitized_entries}"
-    )
+    # Structured output guarantees JSON; validation caps list lengths
+    return validate_ai_response(json.loads(text))
+
+def call_ai_service(sanitized_entries, retries=0):
+    """Enhanced AI service call with optional retries and better error handling."""
+    client = get_ai_client()
+    prompt = build_analysis_prompt(sanitized_entries)
     
     for attempt in range(retries + 1):
         try:
             response = client.models.generate_content(
                 model="gemini-2.0-flash",
                 contents=prompt,
-                generation_config={
-                    "temperature": 0.3,  # Lower temperature for more consistent JSON
-                    "max_output_tokens": 1024,
-                    "top_p": 0.8
-                }
+                config={"system_instruction": _SYSTEM_INSTRUCTION, **_GEN_CFG}
             )
             
-            if not response.text:
-                raise ValueError("Empty response from AI service")
-            
-            # Clean response text (remove any markdown formatting)
-            clean_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if clean_text.startswith('```json'):
-                clean_text = clean_text[7:]
-            elif clean_text.startswith('```'):
-                clean_text = clean_text[3:]
-            
-            if clean_text.endswith('```'):
-                clean_text = clean_text[:-3]
-            
-            clean_text = clean_text.strip()
-            
-            # Parse JSON
-            result = json.loads(clean_text)
-            
-            # Validate and sanitize response structure
-            validated_result = validate_ai_response(result)
-            
-            return validated_result
+            return parse_ai_response_text(response.text)
             
         except json.JSONDecodeError as e:
             current_app.logger.warning(f"JSON parsing failed on attempt {attempt + 1}: {e}")
@@ -200,11 +219,141 @@ def get_fallback_analysis():
         ]
     }
 
-def generate_cache_key(user_id, days, max_entries, entry_ids):
-    """Generate cache key based on parameters and actual entries."""
-    # Create a deterministic hash of the parameters and entry content
-    content = f"{user_id}_{days}_{max_entries}_{hash(tuple(sorted(entry_ids)))}"
-    return f"analytics_{hashlib.md5(content.encode()).hexdigest()}"
+def generate_cache_key(user_id, days, max_entries, latest_update, entry_count):
+    """Generate cache key based on parameters and the state of the entries.
+
+    The latest update time and the number of matching entries change whenever
+    an entry is added, edited or deleted, so they identify the analyzed data
+    without fetching the entries themselves.
+    """
+    latest = latest_update.isoformat() if latest_update else "none"
+    content = f"{user_id}_{days}_{max_entries}_{latest}_{entry_count}"
+    return f"analytics_{hashlib.blake2b(content.encode(), digest_size=8).hexdigest()}"
+
+def store_batch_result(key, text, context):
+    """Parse a finished batch analysis and write it into the result cache."""
+    try:
+        ai_result = parse_ai_response_text(text)
+    except (ValueError, json.JSONDecodeError) as e:
+        current_app.logger.warning(f"Discarding unparseable batch result {key}: {e}")
+        return
+    
+    response_data = dict(context["response"])
+    response_data["results"] = ai_result
+    response_data["analysis_timestamp"] = datetime.utcnow().isoformat()
+    get_cache().set(context["cache_key"], response_data)
+
+def get_batch_queue():
+    """Return the batch queue of the current application, creating it on first use."""
+    app = current_app._get_current_object()
+    if 'analytics_batch' not in app.extensions:
+        app.extensions['analytics_batch'] = AnalyticsBatchQueue(
+            app,
+            client_factory=get_ai_client,
+            on_result=store_batch_result,
+            request_config={
+                "system_instruction": {"parts": [{"text": _SYSTEM_INSTRUCTION}]},
+                "generation_config": _GEN_CFG
+            },
+            interval=app.config.get('ANALYTICS_BATCH_INTERVAL', 60),
+            poll_interval=app.config.get('ANALYTICS_BATCH_POLL_INTERVAL', 30)
+        )
+    return app.extensions['analytics_batch']
+
+def analyzable_entries_filter(user_id, cutoff_date):
+    """Return the filter for a user's entries that can be analyzed."""
+    return (
+        Journal.user_id == user_id,
+        Journal.deleted_at.is_(None),  # Exclude soft-deleted entries
+        Journal.created_at >= cutoff_date,
+        Journal.answer.isnot(None),  # Only entries with content
+        Journal.answer != ''
+    )
+
+def load_analyzable_entries(user_id, cutoff_date, max_entries):
+    """Load the most recent analyzable entries as rows of the prompt columns.
+
+    Prompt and answer are truncated in the SELECT (50 and 200 characters) so
+    long entries never cross the ORM boundary in full.
+    """
+    return db.session.query(
+        Journal.id,
+        func.substr(Journal.prompt, 1, 50).label("prompt"),
+        func.substr(Journal.answer, 1, 200).label("answer"),
+        Journal.created_at,
+        Journal.modality
+    ).filter(*analyzable_entries_filter(user_id, cutoff_date)) \
+     .order_by(Journal.created_at.desc()).limit(max_entries).all()
+
+def with_etag(response, cache_key):
+    """Mark an analysis response as revalidatable by its cache key."""
+    response.set_etag(cache_key)
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    return response
+
+def analysis_date_range(cutoff_date, now, days):
+    """Describe the analyzed period for API responses."""
+    return {
+        "from": cutoff_date.strftime("%Y-%m-%d"),
+        "to": now.strftime("%Y-%m-%d"),
+        "days": days
+    }
+
+def run_analysis(user_id, max_entries, cutoff_date, cache_key, date_range):
+    """Load, sanitize and analyze a user's entries and cache the result.
+
+    Returns:
+        tuple: (response_data, status_code, cached), where cached tells
+        whether the result was stored (the fallback never is)
+    """
+    entries = load_analyzable_entries(user_id, cutoff_date, max_entries)
+    
+    # Sanitize entries for AI processing
+    sanitized_entries = sanitize_entries_for_ai(entries, max_entries)
+    
+    # Call AI service with enhanced error handling
+    used_fallback = False
+    try:
+        ai_result = call_ai_service(sanitized_entries)
+    except ValueError as ve:
+        # Handle specific AI service errors
+        if "quota" in str(ve).lower() or "limit" in str(ve).lower():
+            return {
+                "error": "Analysis service temporarily unavailable due to high demand. Please try again later."
+            }, 503, False
+        else:
+            # Return fallback analysis for other AI errors
+            ai_result = get_fallback_analysis()
+            used_fallback = True
+            current_app.logger.warning(f"Using fallback analysis due to AI error: {ve}")
+    
+    # Prepare response
+    response_data = {
+        "message": "Analysis completed successfully",
+        "results": ai_result,
+        "entries_analyzed": len(entries),
+        "date_range": date_range,
+        "analysis_timestamp": datetime.utcnow().isoformat()
+    }
+    
+    # Cache the result for an hour, but never cache the fallback content
+    if not used_fallback:
+        get_cache().set(cache_key, response_data)
+    
+    # Log successful analysis (without sensitive data)
+    current_app.logger.info(
+        f"Analytics completed for user {user_id}: "
+        f"{len(entries)} entries analyzed over {date_range['days']} days"
+    )
+    
+    return response_data, 200, not used_fallback
+
+def run_analysis_job(user_id, max_entries, cutoff_iso, cache_key, date_range):
+    """Background job wrapper around run_analysis with a JSON-safe result."""
+    response_data, status_code, _ = run_analysis(
+        user_id, max_entries, datetime.fromisoformat(cutoff_iso), cache_key, date_range
+    )
+    return {"response": response_data, "status_code": status_code}
 
 @analytics_bp.route('/analyze', methods=['GET'])
 @login_required
@@ -215,6 +364,7 @@ def analyze_entries():
         days = request.args.get('days', default=30, type=int)
         max_entries = request.args.get('max_entries', default=25, type=int)
         force_refresh = request.args.get('force_refresh', default=False, type=bool)
+        mode = request.args.get('mode', default='sync')
         
         # Parameter validation
         if days < 1 or days > 365:
@@ -227,20 +377,27 @@ def analyze_entries():
                 "error": "Max entries parameter must be between 1 and 50"
             }), 400
         
-        # Calculate cutoff date
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        if mode not in ('sync', 'async', 'batch'):
+            return jsonify({
+                "error": "Mode parameter must be 'sync', 'async' or 'batch'"
+            }), 400
         
-        # Get entries with comprehensive filtering
-        entries = Journal.query.filter(
-            Journal.user_id == current_user.id,
-            Journal.deleted_at.is_(None),  # Exclude soft-deleted entries
-            Journal.created_at >= cutoff_date,
-            Journal.answer.isnot(None),  # Only entries with content
-            Journal.answer != ''
-        ).order_by(Journal.created_at.desc()).limit(max_entries).all()
+        # Calculate cutoff date and the reported period once per request
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=days)
+        date_range = analysis_date_range(cutoff_date, now, days)
+        
+        entry_filter = analyzable_entries_filter(current_user.id, cutoff_date)
+        
+        # One scalar query decides between the early returns, the cache and
+        # the full pipeline, so cache hits never load the entries
+        latest_update, entry_count = db.session.query(
+            func.max(Journal.updated_at), func.count(Journal.id)
+        ).filter(*entry_filter).one()
+        entries_analyzed = min(entry_count, max_entries)
         
         # Check if we have enough data
-        if not entries:
+        if entries_analyzed == 0:
             return jsonify({
                 "message": "No journal entries found for analysis",
                 "results": {
@@ -253,15 +410,11 @@ def analyze_entries():
                     ]
                 },
                 "entries_analyzed": 0,
-                "date_range": {
-                    "from": cutoff_date.strftime("%Y-%m-%d"),
-                    "to": datetime.utcnow().strftime("%Y-%m-%d"),
-                    "days": days
-                }
+                "date_range": date_range
             }), 200
         
         # Check for minimum entries for meaningful analysis
-        if len(entries) < 3:
+        if entries_analyzed < 3:
             return jsonify({
                 "message": "Need more entries for comprehensive analysis",
                 "results": {
@@ -276,68 +429,79 @@ def analyze_entries():
                         "What would I like to focus on tomorrow?"
                     ]
                 },
-                "entries_analyzed": len(entries),
-                "date_range": {
-                    "from": cutoff_date.strftime("%Y-%m-%d"),
-                    "to": datetime.utcnow().strftime("%Y-%m-%d"),
-                    "days": days
-                }
+                "entries_analyzed": entries_analyzed,
+                "date_range": date_range
             }), 200
         
         # Generate cache key and check cache (if not forcing refresh)
-        cache_key = generate_cache_key(current_user.id, days, max_entries, [e.id for e in entries])
+        cache_key = generate_cache_key(current_user.id, days, max_entries, latest_update, entry_count)
+        
+        # The cache key identifies the analyzed data, so a client that already
+        # holds the result for it can revalidate without another AI call
+        if not force_refresh and request.if_none_match.contains(cache_key):
+            return with_etag(current_app.response_class(status=304), cache_key)
         
-        # in production, we will use Redis or similar for caching
-        # For now, we'll skip caching but keep the structure
+        cache = get_cache()
         cached_result = None
         if not force_refresh:
-            # cached_result = cache.get(cache_key)
-            pass
+            cached_result = cache.get(cache_key)
         
         if cached_result:
             current_app.logger.info(f"Returning cached analytics for user {current_user.id}")
-            return jsonify(cached_result), 200
-        
-        # Sanitize entries for AI processing
-        sanitized_entries = sanitize_entries_for_ai(entries, max_entries)
-        
-        # Call AI service with enhanced error handling
-        try:
-            ai_result = call_ai_service(sanitized_entries)
-        except ValueError as ve:
-            # Handle specific AI service errors
-            if "quota" in str(ve).lower() or "limit" in str(ve).lower():
-                return jsonify({
-                    "error": "Analysis service temporarily unavailable due to high demand. Please try again later."
-                }), 503
-            else:
-                # Return fallback analysis for other AI errors
-                ai_result = get_fallback_analysis()
-                current_app.logger.warning(f"Using fallback analysis due to AI error: {ve}")
-        
-        # Prepare response
-        response_data = {
-            "message": "Analysis completed successfully",
-            "results": ai_result,
-            "entries_analyzed": len(entries),
-            "date_range": {
-                "from": cutoff_date.strftime("%Y-%m-%d"),
-                "to": datetime.utcnow().strftime("%Y-%m-%d"),
-                "days": days
-            },
-            "analysis_timestamp": datetime.utcnow().isoformat()
-        }
+            return with_etag(jsonify(cached_result), cache_key)
         
-        # Cache the result (implement with your preferred caching solution)
-        # cache.set(cache_key, response_data, timeout=3600)  # Cache for 1 hour
+        # Batch mode: queue the analysis for Gemini Batch Mode and let the
+        # client poll this endpoint until the result shows up in the cache
+        if mode == 'batch' and not force_refresh:
+            if not os.getenv('GEMINI_API_KEY'):
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            
+            entries = load_analyzable_entries(current_user.id, cutoff_date, max_entries)
+            sanitized_entries = sanitize_entries_for_ai(entries, max_entries)
+            
+            get_batch_queue().enqueue(
+                f"user_{current_user.id}_{cache_key}",
+                build_analysis_prompt(sanitized_entries),
+                {
+                    "cache_key": cache_key,
+                    "response": {
+                        "message": "Analysis completed successfully",
+                        "entries_analyzed": len(entries),
+                        "date_range": date_range
+                    }
+                }
+            )
+            
+            return jsonify({
+                "message": "Analysis queued for batch processing",
+                "status": "queued",
+                "entries_analyzed": len(entries),
+                "date_range": date_range
+            }), 202
+        
+        # Async mode: run the analysis on a background worker and hand back
+        # a job id the client polls at /analytics/analyze/<job_id>
+        if mode == 'async':
+            job_id = get_job_runner().submit(
+                ANALYSIS_JOB_PREFIX, current_user.id, run_analysis_job,
+                current_user.id, max_entries, cutoff_date.isoformat(), cache_key, date_range
+            )
+            return jsonify({
+                "message": "Analysis started",
+                "job_id": job_id,
+                "status": "pending"
+            }), 202
         
-        # Log successful analysis (without sensitive data)
-        current_app.logger.info(
-            f"Analytics completed for user {current_user.id}: "
-            f"{len(entries)} entries analyzed over {days} days"
+        response_data, status_code, cached = run_analysis(
+            current_user.id, max_entries, cutoff_date, cache_key, date_range
         )
+        response = jsonify(response_data)
+        response.status_code = status_code
         
-        return jsonify(response_data), 200
+        # Only results that were cached (never the fallback) get an ETag
+        if cached:
+            with_etag(response, cache_key)
+        return response
     
     except ValueError as ve:
         current_app.logger.error(f"Analytics configuration error: {str(ve)}")
@@ -351,6 +515,24 @@ def analyze_entries():
             "error": "Analysis failed due to an unexpected error. Please try again later."
         }), 500
 
+@analytics_bp.route('/analyze/<job_id>', methods=['GET'])
+@login_required
+def get_analysis_job(job_id):
+    """Return the status or result of a background analysis job."""
+    job = get_job_runner().get(ANALYSIS_JOB_PREFIX, job_id, current_user.id)
+    if job is None:
+        return jsonify({"error": "Analysis job not found"}), 404
+    
+    if job["status"] == "completed":
+        return jsonify(job["result"]["response"]), job["result"]["status_code"]
+    
+    if job["status"] == "failed":
+        return jsonify({
+            "error": "Analysis failed due to an unexpected error. Please try again later."
+        }), 500
+    
+    return jsonify({"job_id": job_id, "status": job["status"]}), 202
+
 @analytics_bp.route('/mood-trends', methods=['GET'])
 @login_required
 def get_mood_trends():
@@ -361,59 +543,53 @@ def get_mood_trends():
         if days < 1 or days > 365:
             return jsonify({"error": "Days parameter must be between 1 and 365"}), 400
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=days)
+        date_range = analysis_date_range(cutoff_date, now, days)
         
-        # Get entries grouped by date
-        entries = Journal.query.filter(
+        # Count entries per modality and per day in the database
+        active_filter = (
             Journal.user_id == current_user.id,
             Journal.deleted_at.is_(None),
             Journal.created_at >= cutoff_date
-        ).order_by(Journal.created_at.desc()).all()
+        )
         
-        if not entries:
+        modality_rows = db.session.query(Journal.modality, func.count(Journal.id)) \
+                                  .filter(*active_filter) \
+                                  .group_by(Journal.modality).all()
+        
+        if not modality_rows:
             return jsonify({
                 "message": "No entries found for trend analysis",
                 "trends": {
                     "total_entries": 0,
                     "entries_by_modality": {},
                     "daily_activity": [],
-                    "active_days": 0
+                    "active_days": 0,
+                    "date_range": date_range
                 }
             }), 200
         
-        # Calculate trends
-        modality_counts = {}
-        daily_counts = {}
+        day = func.date(Journal.created_at).label("day")
+        daily_rows = db.session.query(day, func.count(Journal.id)) \
+                               .filter(*active_filter) \
+                               .group_by(day).order_by(day).all()
         
-        for entry in entries:
-            # Count by modality
-            modality = getattr(entry, 'modality', 'text')
-            modality_counts[modality] = modality_counts.get(modality, 0) + 1
-            
-            # Count by day
-            day_key = entry.created_at.strftime("%Y-%m-%d")
-            daily_counts[day_key] = daily_counts.get(day_key, 0) + 1
+        # Calculate trends
+        modality_counts = {modality: count for modality, count in modality_rows}
+        total_entries = sum(modality_counts.values())
         
         # Prepare daily activity data
-        daily_activity = []
-        for day, count in sorted(daily_counts.items()):
-            daily_activity.append({
-                "date": day,
-                "entries": count
-            })
+        daily_activity = [{"date": str(day_key), "entries": count} for day_key, count in daily_rows]
         
         return jsonify({
             "message": "Trend analysis completed",
             "trends": {
-                "total_entries": len(entries),
+                "total_entries": total_entries,
                 "entries_by_modality": modality_counts,
                 "daily_activity": daily_activity,
-                "active_days": len(daily_counts),
-                "date_range": {
-                    "from": cutoff_date.strftime("%Y-%m-%d"),
-                    "to": datetime.utcnow().strftime("%Y-%m-%d"),
-                    "days": days
-                }
+                "active_days": len(daily_activity),
+                "date_range": date_range
             }
         }), 200
     
@@ -443,19 +619,18 @@ def get_analytics_summary():
                 }
             }), 200
         
-        # Get entries from last 30 days
+        # Count entries from last 30 days per day of week in the database
         last_month = datetime.utcnow() - timedelta(days=30)
-        recent_entries = Journal.query.filter(
+        weekday = weekday_number(Journal.created_at).label("weekday")
+        weekday_rows = db.session.query(weekday, func.count(Journal.id)).filter(
             Journal.user_id == current_user.id,
             Journal.deleted_at.is_(None),
             Journal.created_at >= last_month
-        ).all()
+        ).group_by(weekday).all()
         
         # Find most active day of week
-        day_counts = {}
-        for entry in recent_entries:
-            day_name = entry.created_at.strftime("%A")
-            day_counts[day_name] = day_counts.get(day_name, 0) + 1
+        day_counts = {WEEKDAY_NAMES[int(number)]: count for number, count in weekday_rows}
+        entries_this_month = sum(day_counts.values())
         
         most_active_day = max(day_counts.items(), key=lambda x: x[1])[0] if day_counts else None
         
@@ -465,7 +640,7 @@ def get_analytics_summary():
                 "total_entries": total_entries,
                 "current_streak": current_user.current_streak,
                 "longest_streak": current_user.longest_streak,
-                "entries_this_month": len(recent_entries),
+                "entries_this_month": entries_this_month,
                 "most_active_day": most_active_day,
                 "entries_by_day": day_counts
             }
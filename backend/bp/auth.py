@@ -1,8 +1,10 @@
 from backend.models import db, User
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import or_
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_login import LoginManager, login_user, logout_user, login_required
 from datetime import datetime
+from functools import lru_cache
 from backend.utils.decorators import api_login_required
 
 # Define the Blueprint extension for authentication feature (modular)
@@ -25,6 +27,15 @@ def validate_registration_data(data):
     
     return errors
 
+@lru_cache(maxsize=4)
+def get_dummy_password_hash(method):
+    """Return a throwaway hash used to verify passwords for unknown users.
+
+    Running the same hash check whether or not the identifier exists keeps
+    login latency constant, so response times don't reveal valid accounts.
+    """
+    return generate_password_hash("dummy-password", method=method)
+
 @login_manager.user_loader
 def load_user(user_id):
     """Callback function to reload user object from user ID stored in the session cookie.
@@ -61,14 +72,19 @@ def register():
     password = data.get('password')
     
     # Check if the user exists or not 
-    # Username and email have to be unique
-    if User.query.filter_by(username=username).first():
+    # Username and email have to be unique, so check both in one query.
+    # At most two rows can match (one per unique column).
+    existing = db.session.query(User.username, User.email) \
+                         .filter(or_(User.username == username, User.email == email)) \
+                         .limit(2).all()
+    if any(row.username == username for row in existing):
         return jsonify({"error": "Username already exists"}), 409
-    elif User.query.filter_by(email=email).first():
+    elif existing:
         return jsonify({"error": "Email already exists"}), 409
     
     # Hash user's password for security purpose
-    hashed_password = generate_password_hash(password)
+    # The method is explicit so the hashing cost is deterministic per deployment
+    hashed_password = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
     # Create a new user object with username, email, hashed password
     new_user = User(username=username, email=email, password=hashed_password)
     
@@ -103,7 +119,11 @@ def login():
     
     # Check if user exists in the database
     user = User.query.filter((User.username==identifier) | (User.email==identifier)).first()
-    if user and check_password_hash(user.password, password):
+    
+    # Always run a hash check, against a dummy hash when the user is unknown
+    hashed_password = user.password if user else get_dummy_password_hash(current_app.config['PASSWORD_HASH_METHOD'])
+    password_valid = check_password_hash(hashed_password, password)
+    if user and password_valid:
         user.last_activity_date = datetime.utcnow() # update user's last activity to compute user's streak
         login_user(user)
         current_app.logger.info(f"User logged in: {user.username}")
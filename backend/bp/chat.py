@@ -1,10 +1,14 @@
-from backend.models import db, Conversation, Journal
-from flask import Blueprint, request, jsonify, current_app
+from backend.models import db, Conversation, ChatMessage, Journal
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_login import login_required, current_user
+from backend.utils.privacy import remove_sensitive_info
+from backend.utils.cache import get_cache
 import os
-import google.generativeai as genai
-import re
-import bleach
+import nh3
+from functools import lru_cache
+from itertools import islice
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from datetime import datetime, timedelta
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
@@ -13,6 +17,24 @@ chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
 MAX_JOURNAL_ENTRIES_FOR_CONTEXT = 5
 JOURNAL_CONTEXT_DAYS = 30
 
+# Number of previous messages sent to the model with each new message
+MAX_CHAT_HISTORY_MESSAGES = 40
+
+# Built once and shared: no tags, attributes or comments survive. The
+# cleaner is immutable, so threads can use it concurrently.
+_HTML_CLEANER = nh3.Cleaner(tags=set(), attributes={}, strip_comments=True)
+
+def strip_html(text):
+    """Strip HTML tags and comments and escape what remains.
+    
+    Matches bleach.clean(tags=[], strip=True), except that existing entities
+    are kept rather than re-escaped and script/style contents are dropped.
+    """
+    # Text without markup or characters to escape comes back unchanged
+    if '<' not in text and '>' not in text and '&' not in text:
+        return text
+    return _HTML_CLEANER.clean(text)
+
 def validate_message_input(data):
     """Validate and sanitize chat message input."""
     if not data:
@@ -26,7 +48,7 @@ def validate_message_input(data):
         return None, "Message too long (maximum 2000 characters)"
     
     # Basic sanitization
-    clean_message = bleach.clean(message, tags=[], strip=True)
+    clean_message = strip_html(message)
     if not clean_message:
         return None, "Message contains no valid content"
     
@@ -35,65 +57,82 @@ def validate_message_input(data):
         if not isinstance(conversation_id, int) or conversation_id <= 0:
             return None, "Invalid conversation ID"
     
-    return {"message": clean_message, "conversation_id": conversation_id}, None
+    return {
+        "message": clean_message,
+        "conversation_id": conversation_id,
+        "stream": data.get('stream') is True
+    }, None
 
 def sanitize_journal_content_for_ai(text, max_length=150):
     """Sanitize journal content before sending to AI to protect privacy."""
     if not text:
         return ""
     
-    # Remove potentially sensitive information
-    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
-    text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-    text = re.sub(r'\b\(\d{3}\)\s?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-    text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]', text)
-    text = re.sub(r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', '[CARD]', text)
-    text = re.sub(r'\b\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln)\b', '[ADDRESS]', text, flags=re.IGNORECASE)
+    # Scrub the whole text before cutting: placeholders change its length, so
+    # no fixed window guarantees the kept part was scanned in full
+    text = remove_sensitive_info(text)
     
     # Truncate and clean
     text = text[:max_length].strip()
     return text
 
+_CONTEXT_TEMPLATE = (
+    "Here's a brief overview of recent journal activity for context:\n"
+    "{entries}"
+    "\n\nNow, how can I help you today?"
+)
+
 def format_entries_for_initial_context(entries):
     """Enhanced version with better privacy protection."""
     if not entries:
         return ""
     
-    formatted_entries_list = []
-    for entry in entries:
-        # Use relative dates for privacy (month-day only)
-        date_str = entry.created_at.strftime("%m-%d") if hasattr(entry, 'created_at') else "Recent"
-        
-        # Sanitize content before sending to AI
-        prompt_clean = sanitize_journal_content_for_ai(entry.prompt, 50)
-        answer_clean = sanitize_journal_content_for_ai(entry.answer, 100)
-        
-        if prompt_clean and answer_clean:
-            formatted_entries_list.append(
-                f"- On {date_str}, topic: '{prompt_clean}'. Response: '{answer_clean}'"
-            )
+    # Relative dates (month-day only) and sanitized content for privacy;
+    # entries without a usable prompt and answer are skipped
+    formatted_entries = "\n".join(islice((
+        f"- On {entry.created_at:%m-%d}, topic: '{prompt_clean}'. Response: '{answer_clean}'"
+        for entry in entries
+        if (prompt_clean := sanitize_journal_content_for_ai(entry.prompt, 50))
+        and (answer_clean := sanitize_journal_content_for_ai(entry.answer, 100))
+    ), 5))  # Limit to 5 entries max
     
-    if not formatted_entries_list:
+    if not formatted_entries:
         return "No recent journal activity to reference."
     
-    return (
-        "Here's a brief overview of recent journal activity for context:\n"
-        + "\n".join(formatted_entries_list[:5])  # Limit to 5 entries max
-        + "\n\nNow, how can I help you today?"
+    return _CONTEXT_TEMPLATE.format(entries=formatted_entries)
+
+CHAT_SYSTEM_INSTRUCTION = (
+    "You are Kai, a compassionate and insightful journaling companion. Help users explore "
+    "their thoughts and feelings with empathy and wisdom. Ask thoughtful questions, offer "
+    "gentle perspectives, and help users connect insights from their experiences. "
+    "Keep responses conversational, supportive, and under 200 words unless more detail is specifically requested. "
+    "If referencing their journal entries, do so thoughtfully and with respect for their privacy. "
+    "Focus on encouraging self-reflection and personal growth."
+)
+
+CHAT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "max_output_tokens": 1024,
+    "top_p": 0.8
+}
+
+@lru_cache(maxsize=4)
+def get_chat_model(api_key, system_instruction):
+    """Configure the SDK and build the chat model once per key and instruction."""
+    # Imported lazily: the SDK is slow to import and only needed here
+    import google.generativeai as genai
+    
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(
+        model_name="gemini-2.0-flash",
+        system_instruction=system_instruction
     )
 
 def call_gemini_api(model, contents, retries=2):
     """Enhanced Gemini API call with retry logic and better error handling."""
     for attempt in range(retries + 1):
         try:
-            response = model.generate_content(
-                contents,
-                generation_config={
-                    "temperature": 0.7,
-                    "max_output_tokens": 1024,
-                    "top_p": 0.8
-                }
-            )
+            response = model.generate_content(contents, generation_config=CHAT_GENERATION_CONFIG)
             
             # Check for safety blocks
             if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
@@ -113,7 +152,7 @@ def call_gemini_api(model, contents, retries=2):
                 return "I'm currently unable to generate a response. Please try again."
                 
         except Exception as e:
-            current_app.logger.warning(f"Gemini API attempt {attempt + 1} failed: {str(e)}")
+            current_app.logger.warning("Gemini API attempt %s failed: %s", attempt + 1, e)
             
             # Handle specific error types
             error_str = str(e).lower()
@@ -126,41 +165,131 @@ def call_gemini_api(model, contents, retries=2):
     
     return "Sorry, I encountered an issue and couldn't process your message."
 
+class StreamInterrupted(Exception):
+    """The Gemini stream failed after part of the reply was sent.
+
+    The message is the friendly text to show the user.
+    """
+
+def stream_gemini_api(model, contents):
+    """Yield the Gemini reply in chunks as they arrive.
+
+    Errors before any text are turned into the same friendly messages
+    call_gemini_api uses, so such a stream still produces a complete reply.
+    Errors after some text raise StreamInterrupted instead, so the partial
+    reply is never mistaken for a finished one.
+    """
+    produced = False
+    try:
+        response = model.generate_content(contents, generation_config=CHAT_GENERATION_CONFIG, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety blocks) raise on .text
+                continue
+            if text:
+                produced = True
+                yield text
+    except Exception as e:
+        current_app.logger.warning("Gemini streaming failed: %s", e)
+        error_str = str(e).lower()
+        if "quota" in error_str or "limit" in error_str:
+            message = "I'm experiencing high demand right now. Please try again in a few minutes."
+        else:
+            message = "I'm having technical difficulties. Please try again later."
+        
+        if produced:
+            raise StreamInterrupted(message) from e
+        yield message
+        return
+    
+    if not produced:
+        yield "I'm currently unable to generate a response. Please try again."
+
 def generate_conversation_title(chat_data):
     """Generate a meaningful title from conversation data."""
     if not chat_data:
         return "New Chat"
     
-    # Find first substantial user message
+    # Use the first substantial user message, truncated for the title
     for message in chat_data:
-        if message.get("role") == "user" and message.get("parts"):
-            first_message = message["parts"][0] if message["parts"] else ""
-            if first_message and len(first_message.strip()) > 3:
-                # Clean and truncate for title
-                title = first_message.strip()[:40]
-                if len(first_message) > 40:
-                    title += "..."
-                return title
+        if message.get("role") != "user":
+            continue
+        parts = message.get("parts")
+        if not parts or not parts[0]:
+            continue
+        first_message = parts[0].strip()
+        if len(first_message) > 3:
+            return first_message[:40] + "..." if len(first_message) > 40 else first_message
     
     return "Chat Session"
 
+def generate_message_preview(message):
+    """Shorten an AI reply for the conversation list."""
+    if not message:
+        return ""
+    preview = message[:60]
+    if len(message) > 60:
+        preview += "..."
+    return preview
+
+def get_user_conversation(conversation_id, include_deleted=False):
+    """Look up one of the current user's conversations by primary key.
+
+    db.session.get() is served from the identity map when the conversation is
+    already loaded and otherwise runs a cached primary-key SELECT; ownership
+    and soft deletion are checked on the loaded object.
+    """
+    conversation = db.session.get(Conversation, conversation_id)
+    if not conversation or conversation.user_id != current_user.id:
+        return None
+    if conversation.deleted_at is not None and not include_deleted:
+        return None
+    return conversation
+
 def get_journal_context_for_new_chat():
-    """Get journal context for new conversations with better error handling."""
+    """Get journal context for new conversations with better error handling.
+
+    The formatted (and PII-scrubbed) context is cached per user and keyed on
+    the latest update time and number of matching entries, so it is only
+    rebuilt after an entry is added, edited or deleted.
+    """
     try:
         cutoff_date = datetime.utcnow() - timedelta(days=JOURNAL_CONTEXT_DAYS)
         
-        recent_entries = Journal.query.filter(
+        context_filter = (
             Journal.user_id == current_user.id,
             Journal.created_at >= cutoff_date,
             Journal.deleted_at.is_(None),
             Journal.answer.isnot(None),
             Journal.answer != ''
-        ).order_by(Journal.created_at.desc()).limit(MAX_JOURNAL_ENTRIES_FOR_CONTEXT).all()
+        )
+        
+        latest_update, entry_count = db.session.query(
+            func.max(Journal.updated_at), func.count(Journal.id)
+        ).filter(*context_filter).one()
+        if not entry_count:
+            return ""
         
-        return format_entries_for_initial_context(recent_entries)
+        cache = get_cache()
+        cache_key = f"chat_context_{current_user.id}_{latest_update.isoformat()}_{entry_count}"
+        journal_context = cache.get(cache_key)
+        if journal_context is not None:
+            return journal_context
+        
+        # Served by ix_journal_user_active_created; only the columns used in the context are loaded
+        recent_entries = Journal.query.options(
+            load_only(Journal.prompt, Journal.answer, Journal.created_at)
+        ).filter(*context_filter) \
+         .order_by(Journal.created_at.desc()).limit(MAX_JOURNAL_ENTRIES_FOR_CONTEXT).all()
+        
+        journal_context = format_entries_for_initial_context(recent_entries)
+        cache.set(cache_key, journal_context, timeout=current_app.config.get('CHAT_CONTEXT_CACHE_TIMEOUT', 300))
+        return journal_context
         
     except Exception as e:
-        current_app.logger.warning(f"Failed to get journal context: {e}")
+        current_app.logger.warning("Failed to get journal context: %s", e)
         return ""
 
 @chat_bp.route('/conversations', methods=['GET'])
@@ -178,61 +307,46 @@ def get_conversations():
         if per_page < 1 or per_page > 50:
             per_page = 20
         
-        # Query with better filtering and pagination
-        pagination = Conversation.query.filter(
+        # Project the denormalized summary columns so chat blobs are never loaded.
+        # One extra row is fetched to tell whether another page exists, so no
+        # COUNT(*) query is needed.
+        rows = db.session.query(
+            Conversation.id,
+            func.coalesce(Conversation.title, "New Chat").label("title"),
+            func.coalesce(Conversation.last_message_preview, "").label("last_message_preview"),
+            Conversation.message_count,
+            Conversation.created_at,
+            Conversation.updated_at
+        ).filter(
             Conversation.user_id == current_user.id,
             Conversation.deleted_at.is_(None)
-        ).order_by(Conversation.updated_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        ).order_by(Conversation.updated_at.desc(), Conversation.id.desc()) \
+         .limit(per_page + 1).offset((page - 1) * per_page).all()
         
-        result = []
-        for conv in pagination.items:
-            try:
-                chat_data = conv.get_chat_data()
-                preview_title = generate_conversation_title(chat_data)
-                
-                # Get last message info
-                last_message_preview = ""
-                if chat_data:
-                    # Get last AI response for preview
-                    for message in reversed(chat_data):
-                        if message.get("role") == "model" and message.get("parts"):
-                            last_message = message["parts"][0] if message["parts"] else ""
-                            if last_message:
-                                last_message_preview = last_message[:60]
-                                if len(last_message) > 60:
-                                    last_message_preview += "..."
-                                break
-                
-                result.append({
-                    "id": conv.id,
-                    "title": preview_title,
-                    "last_message_preview": last_message_preview,
-                    "created_at": conv.created_at.isoformat() if conv.created_at else None,
-                    "updated_at": conv.updated_at.isoformat() if conv.updated_at else None,
-                    "message_count": len(chat_data) if chat_data else 0
-                })
-                
-            except Exception as e:
-                current_app.logger.warning(f"Error processing conversation {conv.id}: {e}")
-                # Skip problematic conversations rather than failing entirely
-                continue
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        result = [{
+            "id": conv.id,
+            "title": conv.title,
+            "last_message_preview": conv.last_message_preview,
+            "created_at": conv.created_at,
+            "updated_at": conv.updated_at,
+            "message_count": conv.message_count
+        } for conv in rows]
         
         return jsonify({
             "conversations": result,
             "pagination": {
-                "total": pagination.total,
-                "pages": pagination.pages,
                 "current_page": page,
                 "per_page": per_page,
-                "has_next": pagination.has_next,
-                "has_prev": pagination.has_prev
+                "has_next": has_next,
+                "has_prev": page > 1
             }
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Error retrieving conversations: {str(e)}")
+        current_app.logger.error("Error retrieving conversations: %s", e)
         return jsonify({"error": "Failed to retrieve conversations"}), 500
 
 @chat_bp.route('/conversations/<int:conversation_id>', methods=['GET'])
@@ -244,46 +358,64 @@ def get_single_conversation_history(conversation_id):
         if conversation_id <= 0:
             return jsonify({"error": "Invalid conversation ID"}), 400
         
-        conversation = Conversation.query.filter(
-            Conversation.id == conversation_id,
-            Conversation.user_id == current_user.id,
-            Conversation.deleted_at.is_(None)
-        ).first()
+        conversation = get_user_conversation(conversation_id)
         
         if not conversation:
             return jsonify({"error": "Conversation not found or access denied"}), 404
         
-        chat_history = conversation.get_chat_data()
-        
-        # Clean history for frontend (remove any context messages)
-        cleaned_history = []
-        for message in chat_history:
-            if message.get("role") == "user":
-                # Only include the actual user message, not context
-                parts = message.get("parts", [])
-                if parts:
-                    # Take the last part which should be the actual user message
-                    user_message = parts[-1] if len(parts) > 1 else parts[0]
-                    cleaned_history.append({
-                        "role": "user",
-                        "parts": [user_message]
-                    })
-            else:
-                cleaned_history.append(message)
+        # Plain (role, content) rows; no ORM objects are built for the history
+        messages = db.session.query(ChatMessage.role, ChatMessage.content) \
+                             .filter(ChatMessage.conversation_id == conversation.id) \
+                             .order_by(ChatMessage.id).all()
+        history = [{"role": role, "parts": [content]} for role, content in messages]
         
         return jsonify({
             "conversation_id": conversation.id,
-            "title": generate_conversation_title(chat_history),
-            "history": cleaned_history,
-            "created_at": conversation.created_at.isoformat() if conversation.created_at else None,
-            "updated_at": conversation.updated_at.isoformat() if conversation.updated_at else None,
-            "message_count": len(cleaned_history)
+            "title": conversation.title or generate_conversation_title(history),
+            "history": history,
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "message_count": len(history)
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Error retrieving conversation history for ID {conversation_id}: {str(e)}")
+        current_app.logger.error("Error retrieving conversation history for ID %s: %s", conversation_id, e)
         return jsonify({"error": "Failed to retrieve conversation history"}), 500
 
+def get_recent_chat_history(conversation_id):
+    """Return the last messages of a conversation in Gemini's chat format."""
+    messages = db.session.query(ChatMessage.role, ChatMessage.content) \
+                         .filter(ChatMessage.conversation_id == conversation_id) \
+                         .order_by(ChatMessage.id.desc()) \
+                         .limit(MAX_CHAT_HISTORY_MESSAGES).all()
+    return [{"role": role, "parts": [content]} for role, content in reversed(messages)]
+
+def save_chat_turn(conversation_object, user_message_text, ai_response_text, is_new_chat):
+    """Append one user/model exchange to a conversation and commit it."""
+    try:
+        # Two inserts, keeping the listing columns in sync with the messages
+        db.session.add_all([
+            ChatMessage(conversation=conversation_object, role="user", content=user_message_text),
+            ChatMessage(conversation=conversation_object, role="model", content=ai_response_text)
+        ])
+        conversation_object.message_count = (conversation_object.message_count or 0) + 2
+        conversation_object.last_message_preview = generate_message_preview(ai_response_text)
+        if not conversation_object.title:
+            conversation_object.title = generate_conversation_title(
+                [{"role": "user", "parts": [user_message_text]}]
+            )
+        db.session.add(conversation_object)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    # Log successful interaction (without sensitive data)
+    current_app.logger.info(
+        "Chat message processed for user %s, conversation %s, new_chat: %s",
+        current_user.id, conversation_object.id, is_new_chat
+    )
+
 @chat_bp.route('/message', methods=['POST'])
 @login_required
 def post_message():
@@ -304,27 +436,9 @@ def post_message():
             return jsonify({"error": "Chat service temporarily unavailable"}), 503
         
         try:
-            genai.configure(api_key=api_key)
-        except Exception as e:
-            current_app.logger.error(f"Gemini configuration failed: {e}")
-            return jsonify({"error": "Chat service initialization failed"}), 503
-        
-        system_instruction = (
-            "You are Kai, a compassionate and insightful journaling companion. Help users explore "
-            "their thoughts and feelings with empathy and wisdom. Ask thoughtful questions, offer "
-            "gentle perspectives, and help users connect insights from their experiences. "
-            "Keep responses conversational, supportive, and under 200 words unless more detail is specifically requested. "
-            "If referencing their journal entries, do so thoughtfully and with respect for their privacy. "
-            "Focus on encouraging self-reflection and personal growth."
-        )
-        
-        try:
-            model = genai.GenerativeModel(
-                model_name="gemini-2.0-flash",
-                system_instruction=system_instruction
-            )
+            model = get_chat_model(api_key, CHAT_SYSTEM_INSTRUCTION)
         except Exception as e:
-            current_app.logger.error(f"Failed to create Gemini model: {e}")
+            current_app.logger.error("Failed to create Gemini model: %s", e)
             return jsonify({"error": "Chat service initialization failed"}), 503
         
         # Handle conversation management
@@ -333,22 +447,17 @@ def post_message():
         journal_context = ""
         
         if conversation_id:
-            conversation_object = Conversation.query.filter(
-                Conversation.id == conversation_id,
-                Conversation.user_id == current_user.id,
-                Conversation.deleted_at.is_(None)
-            ).first()
+            conversation_object = get_user_conversation(conversation_id)
             
             if not conversation_object:
                 return jsonify({"error": "Conversation not found or access denied"}), 404
             
-            chat_history = conversation_object.get_chat_data()
+            chat_history = get_recent_chat_history(conversation_object.id)
         else:
-            # Create new conversation
+            # Create new conversation; it is inserted together with the first
+            # exchange so the request needs only one write
             is_new_chat = True
             conversation_object = Conversation(user_id=current_user.id)
-            db.session.add(conversation_object)
-            db.session.flush()  # Get ID without committing
             
             chat_history = []
             
@@ -356,7 +465,7 @@ def post_message():
             journal_context = get_journal_context_for_new_chat()
         
         # Prepare AI input
-        contents_for_ai = list(chat_history)
+        contents_for_ai = chat_history
         
         # Add current message (with context if new chat)
         current_message_parts = []
@@ -366,22 +475,40 @@ def post_message():
         
         contents_for_ai.append({"role": "user", "parts": current_message_parts})
         
+        # Streaming: send the reply as newline-delimited JSON while it is
+        # generated and save the turn once the model is done. The response
+        # has already started, so failures end the stream with an error line
+        # instead of reaching the handler below, and only a completed reply
+        # is saved.
+        if validated_data["stream"]:
+            def generate():
+                parts = []
+                try:
+                    for delta in stream_gemini_api(model, contents_for_ai):
+                        parts.append(delta)
+                        yield current_app.json.dumps({"delta": delta}) + "\n"
+                    
+                    save_chat_turn(conversation_object, user_message_text, "".join(parts), is_new_chat)
+                except StreamInterrupted as e:
+                    yield current_app.json.dumps({"error": str(e)}) + "\n"
+                    return
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error("Chat message processing failed: %s", e)
+                    yield current_app.json.dumps({"error": "Failed to process message. Please try again."}) + "\n"
+                    return
+                
+                yield current_app.json.dumps({
+                    "done": True,
+                    "conversation_id": conversation_object.id,
+                    "is_new_conversation": is_new_chat
+                }) + "\n"
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
         # Get AI response
         ai_response_text = call_gemini_api(model, contents_for_ai)
-        
-        # Update chat history for database
-        chat_history.append({"role": "user", "parts": [user_message_text]})
-        chat_history.append({"role": "model", "parts": [ai_response_text]})
-        
-        # Save to database
-        conversation_object.set_chat_data(chat_history)
-        db.session.commit()
-        
-        # Log successful interaction (without sensitive data)
-        current_app.logger.info(
-            f"Chat message processed for user {current_user.id}, "
-            f"conversation {conversation_object.id}, new_chat: {is_new_chat}"
-        )
+        save_chat_turn(conversation_object, user_message_text, ai_response_text, is_new_chat)
         
         return jsonify({
             "ai_message": ai_response_text,
@@ -392,7 +519,7 @@ def post_message():
         
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Chat message processing failed: {str(e)}")
+        current_app.logger.error("Chat message processing failed: %s", e)
         return jsonify({
             "error": "Failed to process message. Please try again."
         }), 500
@@ -407,16 +534,13 @@ def delete_conversation(conversation_id):
             return jsonify({"error": "Invalid conversation ID"}), 400
         
         # Fetch conversation, including those already soft-deleted to prevent errors if called twice
-        conversation = Conversation.query.filter(
-            Conversation.id == conversation_id,
-            Conversation.user_id == current_user.id
-        ).first()
+        conversation = get_user_conversation(conversation_id, include_deleted=True)
         
         if not conversation:
             return jsonify({"error": "Conversation not found or access denied"}), 404
 
         # Check if already deleted
-        if hasattr(conversation, 'deleted_at') and conversation.deleted_at is not None:
+        if conversation.deleted_at is not None:
             return jsonify({"message": "Conversation was already deleted"}), 200  # Idempotency
         
         # Soft delete
@@ -431,14 +555,14 @@ def delete_conversation(conversation_id):
         db.session.commit()
         
         current_app.logger.info(
-            f"Conversation {conversation_id} {action_taken} by user {current_user.id}"
+            "Conversation %s %s by user %s", conversation_id, action_taken, current_user.id
         )
         
         return jsonify({"message": f"Conversation {action_taken} successfully"}), 200
             
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting conversation {conversation_id}: {str(e)}")
+        current_app.logger.error("Error deleting conversation %s: %s", conversation_id, e)
         return jsonify({"error": "Failed to delete conversation"}), 500
 
 @chat_bp.route('/conversations/<int:conversation_id>/title', methods=['PUT'])
@@ -462,13 +586,9 @@ def update_conversation_title(conversation_id):
             return jsonify({"error": "Title too long (maximum 100 characters)"}), 400
         
         # Sanitize title
-        clean_title = bleach.clean(new_title, tags=[], strip=True)
+        clean_title = strip_html(new_title)
         
-        conversation = Conversation.query.filter(
-            Conversation.id == conversation_id,
-            Conversation.user_id == current_user.id,
-            Conversation.deleted_at.is_(None)
-        ).first()
+        conversation = get_user_conversation(conversation_id)
         
         if not conversation:
             return jsonify({"error": "Conversation not found or access denied"}), 404
@@ -483,5 +603,5 @@ def update_conversation_title(conversation_id):
         
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating conversation title: {str(e)}")
+        current_app.logger.error("Error updating conversation title: %s", e)
         return jsonify({"error": "Failed to update conversation title"}), 500
\ No newline at end of file
@@ -1,40 +1,132 @@
 from backend.models import db, User, Journal
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import select, insert, update, func
+from backend.utils.jobs import get_job_runner
+from backend.utils.ocr_batch import OCRBatcher
 
-# Libraries for multimodal input transcription
-import easyocr
 import os
-import uuid
-import tempfile
+import re
+import threading
 import datetime
-from werkzeug.utils import secure_filename
-import bleach
+from io import BytesIO
+import nh3
+import numpy as np
+from PIL import Image, ImageOps
 
 # Define the blueprint for journal feature with a prefix of '/journal'
 journal_bp = Blueprint('journal', __name__, url_prefix='/journal')
 
-# Initialize OCR reader once (consider lazy loading in production)
-ocr_reader = easyocr.Reader(['en'])
+# Cache key prefix for background OCR jobs
+OCR_JOB_PREFIX = "journal_ocr_job"
+
+# The OCR reader loads its model weights on first use, so workers that never
+# handle image entries do not pay for them
+_ocr_reader = None
+_ocr_lock = threading.Lock()
+
+def get_ocr_reader():
+    """Return the shared easyocr reader, creating it on first use."""
+    global _ocr_reader
+    if _ocr_reader is None:
+        with _ocr_lock:
+            if _ocr_reader is None:
+                import easyocr
+                import torch
+                
+                # Decide the device once; on CPU the int8-quantized models are
+                # used. EASYOCR_MODEL_DIR keeps the weights on a persistent
+                # volume so restarts do not download them again.
+                use_gpu = torch.cuda.is_available()
+                _ocr_reader = easyocr.Reader(
+                    ['en'],
+                    gpu=use_gpu,
+                    quantize=not use_gpu,
+                    model_storage_directory=os.getenv('EASYOCR_MODEL_DIR')
+                )
+    return _ocr_reader
+
+def ocr_readtext(image):
+    """Run OCR on image, batching it with concurrent requests when enabled."""
+    max_batch = current_app.config.get('OCR_BATCH_SIZE', 1)
+    if max_batch <= 1:
+        return get_ocr_reader().readtext(image)
+    
+    batcher = current_app.extensions.get('ocr_batcher')
+    if batcher is None:
+        with _ocr_lock:
+            batcher = current_app.extensions.get('ocr_batcher')
+            if batcher is None:
+                batcher = OCRBatcher(
+                    get_ocr_reader,
+                    max_batch=max_batch,
+                    window=current_app.config.get('OCR_BATCH_WINDOW', 0.1)
+                )
+                current_app.extensions['ocr_batcher'] = batcher
+    return batcher.readtext(image)
+
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg'})
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'wav', 'mp3', 'm4a'})
 
 def allowed_image_file(filename):
     """Validate if uploaded file has an allowed image extension."""
-    return '.' in filename and \
-        filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg'}
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in ALLOWED_IMAGE_EXTENSIONS
 
 def allowed_audio_file(filename):
     """Validate if uploaded file has an allowed audio extension."""
-    return '.' in filename and \
-        filename.rsplit('.', 1)[1].lower() in {'wav', 'mp3', 'm4a'}
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in ALLOWED_AUDIO_EXTENSIONS
+
+# Built once and shared: no tags or attributes survive. The cleaner is
+# immutable, so threads can use it concurrently.
+_TEXT_CLEANER = nh3.Cleaner(tags=set(), attributes={}, strip_comments=True)
 
 def sanitize_text_input(text, max_length=10000):
     """Sanitize and validate text input to prevent XSS attacks."""
     if not text:
         return None
     
+    text = text.strip()
+    if not text:
+        return None
+    
+    # Text without markup or characters to escape comes back unchanged. Three
+    # substring checks are much faster than a [<>&] regex search on long text.
+    if '<' not in text and '>' not in text and '&' not in text:
+        return text[:max_length]
+    
     # Remove HTML tags and limit length
-    clean_text = bleach.clean(text.strip(), tags=[], strip=True)
-    return clean_text[:max_length] if len(clean_text) > max_length else clean_text
+    clean_text = _TEXT_CLEANER.clean(text)
+    return clean_text[:max_length]
+
+# Tags are short labels: anything but word characters, whitespace and hyphens
+# is dropped, so no HTML can survive and no sanitizer has to run
+_TAG_RE = re.compile(r'[^\w\s-]')
+
+def sanitize_tag(tag, max_length=150):
+    """Reduce a tag to its allowed characters; None if nothing is left."""
+    if not tag:
+        return None
+    return _TAG_RE.sub('', tag).strip()[:max_length] or None
+
+def lock_user(user_id):
+    """Reload a user and lock its row until the transaction ends.
+    
+    Concurrent submits by the same user then run one after the other, so only
+    one of them can pass the daily-entry check and bump the streak. SQLite has
+    no row locks, so there the transaction starts with BEGIN IMMEDIATE, which
+    takes the database write lock instead.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        connection = db.session.connection()
+        if not connection.connection.driver_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    
+    return db.session.execute(
+        select(User).where(User.id == user_id).with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
 
 def update_user_streak(user, now):
     """Update user's streak based on their last activity.
@@ -46,38 +138,28 @@ def update_user_streak(user, now):
     Returns:
         dict or None: Error message if entry already created today, None otherwise
     """
-    if user.last_activity_date:
-        if user.last_activity_date:
-            # Only check for existing entries if last_activity was from an actual journal entry
-            # Check if there's already a journal entry for today
-            today_entries = Journal.query.filter(
-                Journal.user_id == user.id,
-                Journal.created_at >= now.replace(hour=0, minute=0, second=0, microsecond=0),
-                Journal.deleted_at.is_(None)
-            ).count()
-            
-        if today_entries > 0:
-            return {"error": "Entry already created today"}
-        
-        # Calculate days since last activity (comparing dates, not raw time)
-        last_date = user.last_activity_date.date()
-        today = now.date()
-        days_diff = (today - last_date).days
-        
-        if days_diff == 0:
-            return {"error": "Entry already created today"}
-        elif days_diff == 1:
-            # Continue streak - consecutive day
-            user.current_streak += 1
-        else:
-            # Reset streak if more than 1 day gap
-            user.current_streak = 1
+    last_activity = user.last_activity_date
+    
+    # Calculate days since last activity (comparing dates, not raw time)
+    days_diff = (now.date() - last_activity.date()).days if last_activity else None
+    
+    # Every saved entry sets last_activity_date, so an entry from today
+    # always shows up here and no query is needed
+    if days_diff == 0:
+        return {"error": "Entry already created today"}
+    
+    if days_diff == 1:
+        # Continue streak - consecutive day
+        streak = user.current_streak + 1
     else:
-        # First entry ever
-        user.current_streak = 1
+        # First entry ever, or reset streak after more than 1 day gap
+        streak = 1
+    
+    user.current_streak = streak
     
     # Update longest streak if current exceeds it
-    user.longest_streak = max(user.current_streak, user.longest_streak)
+    if streak > user.longest_streak:
+        user.longest_streak = streak
     user.last_activity_date = now
     return None
 
@@ -100,7 +182,7 @@ def validate_create_entry_data(form_data):
         errors.append("Invalid modality. Must be 'text', 'image', or 'audio'")
     
     # Validate and sanitize tag
-    tag = sanitize_text_input(form_data.get('tag', ''), max_length=150)
+    tag = sanitize_tag(form_data.get('tag', ''))
     
     return errors, {
         'prompt': prompt,
@@ -108,6 +190,100 @@ def validate_create_entry_data(form_data):
         'tag': tag
     }
 
+# Larger images only make text detection slower; phone photos are scaled down
+OCR_MAX_DIMENSION = 1600
+
+# Largest accepted image upload
+MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+
+def extract_image_text(image_bytes):
+    """Run OCR on an uploaded image and return the text it contains.
+    
+    The image is decoded in memory, rotated upright, converted to RGB and
+    scaled down to at most OCR_MAX_DIMENSION pixels per side before it is
+    handed to easyocr as an array.
+    """
+    with Image.open(BytesIO(image_bytes)) as img:
+        # thumbnail() lets the JPEG decoder downscale while decoding
+        img.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        pixels = np.asarray(img)
+    
+    result = ocr_readtext(pixels)
+    extracted_texts = [text[1] for text in result if text[1].strip()]
+    return " ".join(extracted_texts)
+
+def save_entry(user, prompt, answer, modality, tag, full=False):
+    """Save a new journal entry for user and return the response body.
+    
+    The body only identifies the new entry unless full is set, in which case
+    the saved prompt, answer, modality and tag are echoed back as well.
+    """
+    # Final validation of answer length
+    if answer and len(answer) > 10000:
+        answer = answer[:10000]
+        current_app.logger.warning(f"Answer truncated to 10000 characters for user {user.id}")
+    
+    # Insert the entry with a single INSERT ... RETURNING; no Journal object
+    # is built. The streak changes on user are committed with it.
+    entry = db.session.execute(
+        insert(Journal).values(
+            prompt=prompt,
+            answer=answer,
+            modality=modality,
+            tag=tag,
+            user_id=user.id
+        ).returning(Journal.id, Journal.created_at)
+    ).one()
+    db.session.commit()
+    
+    current_app.logger.info(f"Journal entry created: ID {entry.id}, User {user.id}")
+    
+    entry_data = {"id": entry.id, "created_at": entry.created_at.isoformat()}
+    if full:
+        entry_data.update(prompt=prompt, answer=answer, modality=modality, tag=tag)
+    
+    return {
+        "message": "Entry created successfully",
+        "entry": entry_data,
+        "streak": {
+            "current_streak": user.current_streak,
+            "longest_streak": user.longest_streak
+        }
+    }
+
+def run_ocr_entry_job(user_id, image_bytes, prompt, tag, full=False):
+    """Background job: transcribe an image and save it as a journal entry.
+    
+    Returns a JSON-safe {"response", "status_code"} dict, like the response
+    the request would have produced had OCR run inline.
+    """
+    try:
+        answer = extract_image_text(image_bytes)
+    except Exception as ocr_error:
+        current_app.logger.error(f"OCR processing error: {str(ocr_error)}")
+        return {"response": {"error": "Failed to process the image. Please try a clearer image."}, "status_code": 500}
+    
+    if not answer or not answer.strip():
+        return {"response": {"error": "No readable text found in the image"}, "status_code": 400}
+    
+    try:
+        user = lock_user(user_id)
+        
+        # The streak is updated when the entry is saved, not when it was queued
+        streak_error = update_user_streak(user, datetime.datetime.utcnow())
+        if streak_error:
+            return {"response": streak_error, "status_code": 400}
+        
+        return {"response": save_entry(user, prompt, answer, 'image', tag, full), "status_code": 201}
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error creating journal entry: {str(e)}")
+        return {"response": {"error": "An unexpected error occurred while creating the entry"}, "status_code": 500}
+
 @journal_bp.route('/create', methods=['POST'])
 @login_required
 def create_entry():
@@ -115,14 +291,13 @@ def create_entry():
     
     Supports text, image (OCR), and audio input.
     Implements streak tracking and prevents duplicate daily entries.
+    Image entries are transcribed by a background job: the response is a
+    202 with a job id to poll at /journal/job/<job_id>.
+    The created entry is returned as its id and creation time; pass
+    ?include=full to also get the saved fields back.
     """
     now = datetime.datetime.utcnow()  # Use UTC for consistency
     
-    # Update user streak and check for duplicate daily entry
-    streak_error = update_user_streak(current_user, now)
-    if streak_error:
-        return jsonify(streak_error), 400
-    
     # Validate input data
     validation_errors, cleaned_data = validate_create_entry_data(request.form)
     if validation_errors:
@@ -132,6 +307,7 @@ def create_entry():
     modality = cleaned_data['modality']
     tag = cleaned_data['tag']
     answer = None
+    full_response = request.args.get('include') == 'full'
     
     try:
         if modality == 'text':
@@ -151,39 +327,15 @@ def create_entry():
             if not allowed_image_file(image_file.filename):
                 return jsonify({"error": "Invalid image file format. Allowed: png, jpg, jpeg"}), 400
             
-            # Check file size (read content to get actual size)
-            image_file.seek(0, os.SEEK_END)  # Move to end
-            file_size = image_file.tell()    # Get position (file size)
-            image_file.seek(0)               # Reset to beginning
+            # The image is read once and OCR works on the bytes in memory
+            image_bytes = image_file.read()
             
-            if file_size > 10 * 1024 * 1024:  # 10MB limit
-                return jsonify({"error": "File size exceeds 10MB limit"}), 400
+            if len(image_bytes) > MAX_IMAGE_SIZE:
+                return jsonify({"error": "File size exceeds 10MB limit"}), 413
             
-            if file_size == 0:
+            if not image_bytes:
                 return jsonify({"error": "Uploaded file is empty"}), 400
             
-            # Process image with OCR
-            filename = secure_filename(image_file.filename)
-            unique_filename = f"{str(uuid.uuid4())}_{filename}"
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = os.path.join(temp_dir, unique_filename)
-                
-                try:
-                    image_file.save(temp_path)
-                    
-                    # Perform OCR
-                    result = ocr_reader.readtext(temp_path)
-                    extracted_texts = [text[1] for text in result if text[1].strip()]
-                    answer = " ".join(extracted_texts)
-                    
-                    if not answer or not answer.strip():
-                        return jsonify({"error": "No readable text found in the image"}), 400
-                        
-                except Exception as ocr_error:
-                    current_app.logger.error(f"OCR processing error: {str(ocr_error)}")
-                    return jsonify({"error": "Failed to process the image. Please try a clearer image."}), 500
-
         elif modality == 'audio':
             # Validate audio file upload
             if 'file' not in request.files:
@@ -198,47 +350,91 @@ def create_entry():
                 
             return jsonify({"error": "Audio processing feature coming soon"}), 501
         
-        # Final validation of answer length
-        if answer and len(answer) > 10000:
-            answer = answer[:10000]
-            current_app.logger.warning(f"Answer truncated to 10000 characters for user {current_user.id}")
-        
-        # Create journal entry
-        entry = Journal(
-            prompt=prompt,
-            answer=answer,
-            modality=modality,
-            tag=tag,
-            user_id=current_user.id
-        )
-        
-        # Save to database
-        db.session.add(entry)
-        db.session.commit()
-        
-        current_app.logger.info(f"Journal entry created: ID {entry.id}, User {current_user.id}")
-        
-        return jsonify({
-            "message": "Entry created successfully",
-            "entry": {
-                "id": entry.id,
-                "prompt": entry.prompt,
-                "answer": answer,
-                "modality": modality,
-                "tag": tag,
-                "created_at": entry.created_at.isoformat() if hasattr(entry, 'created_at') else None
-            },
-            "streak": {
-                "current_streak": current_user.current_streak,
-                "longest_streak": current_user.longest_streak
-            }
-        }), 201
+        # The body is read and validated, so only now lock the user row
+        # (the whole database on SQLite) for the streak check and insert
+        user = lock_user(current_user.id)
+        
+        # Update user streak and check for duplicate daily entry
+        streak_error = update_user_streak(user, now)
+        if streak_error:
+            db.session.rollback()
+            return jsonify(streak_error), 400
+        
+        if modality == 'image':
+            # OCR takes seconds, so it runs off the request thread; the job
+            # applies the streak update itself when it saves the entry
+            db.session.rollback()
+            job_id = get_job_runner().submit(
+                OCR_JOB_PREFIX, current_user.id, run_ocr_entry_job,
+                current_user.id, image_bytes, prompt, tag, full_response
+            )
+            return jsonify({
+                "message": "Image is being processed",
+                "job_id": job_id,
+                "status": "processing"
+            }), 202
+        
+        return jsonify(save_entry(user, prompt, answer, modality, tag, full_response)), 201
     
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error creating journal entry: {str(e)}")
         return jsonify({"error": "An unexpected error occurred while creating the entry"}), 500
 
+@journal_bp.route('/job/<job_id>', methods=['GET'])
+@login_required
+def get_ocr_job(job_id):
+    """Return the status or result of a background image entry job."""
+    job = get_job_runner().get(OCR_JOB_PREFIX, job_id, current_user.id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    if job["status"] == "completed":
+        return jsonify(job["result"]["response"]), job["result"]["status_code"]
+    
+    if job["status"] == "failed":
+        return jsonify({"error": "An unexpected error occurred while creating the entry"}), 500
+    
+    return jsonify({"job_id": job_id, "status": job["status"]}), 202
+
+# Columns of an entry as returned by the API. Rows selected (or returned) with
+# these become response dicts through .mappings(), so the read and update
+# paths never build Journal objects.
+ENTRY_COLUMNS = (
+    Journal.id,
+    Journal.prompt,
+    Journal.answer,
+    Journal.tag,
+    Journal.modality,
+    Journal.created_at,
+    Journal.updated_at
+)
+
+def paginate_entries(filters, page, per_page):
+    """Return one page of entries matching filters, plus pagination details.
+    
+    Rows are projected straight into dicts, so no Journal objects are built;
+    the JSON provider serializes their datetimes.
+    """
+    total = db.session.scalar(select(func.count(Journal.id)).where(*filters))
+    rows = db.session.execute(
+        select(*ENTRY_COLUMNS)
+        .where(*filters)
+        .order_by(Journal.created_at.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).mappings()
+    
+    pages = -(-total // per_page)
+    return [dict(row) for row in rows], {
+        "total": total,
+        "pages": pages,
+        "current_page": page,
+        "per_page": per_page,
+        "has_next": page < pages,
+        "has_prev": page > 1
+    }
+
 @journal_bp.route('/entries', methods=['GET'])
 @login_required
 def get_all_entries():
@@ -256,33 +452,14 @@ def get_all_entries():
         
         # Query with pagination
         # This helps loading entries in pages
-        pagination = Journal.query.filter_by(user_id=current_user.id) \
-                        .filter(Journal.deleted_at.is_(None)) \
-                        .order_by(Journal.created_at.desc()) \
-                        .paginate(page=page, per_page=per_page, error_out=False)
-        
-        entries_list = []
-        for entry in pagination.items:
-            entries_list.append({
-                "id": entry.id,
-                "prompt": entry.prompt,
-                "answer": entry.answer,
-                "tag": entry.tag,
-                "modality": entry.modality,
-                "created_at": entry.created_at.isoformat() if hasattr(entry, 'created_at') else None,
-                "updated_at": entry.updated_at.isoformat() if hasattr(entry, 'updated_at') else None
-            })
+        entries_list, pagination = paginate_entries(
+            (Journal.user_id == current_user.id, Journal.deleted_at.is_(None)),
+            page, per_page
+        )
         
         return jsonify({
             "entries": entries_list,
-            "pagination": {
-                "total": pagination.total,
-                "pages": pagination.pages,
-                "current_page": page,
-                "per_page": per_page,
-                "has_next": pagination.has_next,
-                "has_prev": pagination.has_prev
-            }
+            "pagination": pagination
         }), 200
     
     except Exception as e:
@@ -295,7 +472,7 @@ def get_entries_by_tag(tag_name):
     """Retrieve journal entries filtered by tag with pagination."""
     try:
         # Sanitize tag name
-        clean_tag = sanitize_text_input(tag_name, max_length=150)
+        clean_tag = sanitize_tag(tag_name)
         if not clean_tag:
             return jsonify({"error": "Invalid tag name"}), 400
         
@@ -309,34 +486,15 @@ def get_entries_by_tag(tag_name):
             per_page = 10
         
         # Query with pagination and tag filter
-        pagination = Journal.query.filter_by(tag=clean_tag, user_id=current_user.id) \
-                        .filter(Journal.deleted_at.is_(None)) \
-                        .order_by(Journal.created_at.desc()) \
-                        .paginate(page=page, per_page=per_page, error_out=False)
-        
-        entries_list = []
-        for entry in pagination.items:
-            entries_list.append({
-                "id": entry.id,
-                "prompt": entry.prompt,
-                "answer": entry.answer,
-                "tag": entry.tag,
-                "modality": entry.modality,
-                "created_at": entry.created_at.isoformat() if hasattr(entry, 'created_at') else None,
-                "updated_at": entry.updated_at.isoformat() if hasattr(entry, 'updated_at') else None
-            })
+        entries_list, pagination = paginate_entries(
+            (Journal.user_id == current_user.id, Journal.tag == clean_tag, Journal.deleted_at.is_(None)),
+            page, per_page
+        )
             
         return jsonify({
             "entries": entries_list,
             "tag": clean_tag,
-            "pagination": {
-                "total": pagination.total,
-                "pages": pagination.pages,
-                "current_page": page,
-                "per_page": per_page,
-                "has_next": pagination.has_next,
-                "has_prev": pagination.has_prev
-            }
+            "pagination": pagination
         }), 200
     
     except Exception as e:
@@ -353,24 +511,15 @@ def get_single_entry(entry_id):
             return jsonify({"error": "Invalid entry ID"}), 400
         
         # Retrieve the journal entry
-        entry = Journal.query.filter_by(id=entry_id, user_id=current_user.id) \
-                           .filter(Journal.deleted_at.is_(None)) \
-                           .first()
+        entry = db.session.execute(
+            select(*ENTRY_COLUMNS)
+            .where(Journal.id == entry_id, Journal.user_id == current_user.id, Journal.deleted_at.is_(None))
+        ).mappings().first()
         
         if not entry:
             return jsonify({"error": "Entry not found or access denied"}), 404
         
-        return jsonify({
-            "entry": {
-                "id": entry.id,
-                "prompt": entry.prompt,
-                "answer": entry.answer,
-                "tag": entry.tag,
-                "modality": entry.modality,
-                "created_at": entry.created_at.isoformat() if hasattr(entry, 'created_at') else None,
-                "updated_at": entry.updated_at.isoformat() if hasattr(entry, 'updated_at') else None
-            }
-        }), 200
+        return jsonify({"entry": dict(entry)}), 200
     
     except Exception as e:
         current_app.logger.error(f"Error retrieving single entry: {str(e)}")
@@ -389,58 +538,53 @@ def update_entry(entry_id):
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        # Find the entry
-        entry = Journal.query.filter_by(id=entry_id, user_id=current_user.id) \
-                           .filter(Journal.deleted_at.is_(None)) \
-                           .first()
-        
-        if not entry:
-            return jsonify({"error": "Entry not found or access denied"}), 404
-        
-        # Track what was updated
-        updated_fields = []
+        # Collect the changed columns
+        values = {}
         
         # Update prompt if provided
         if "prompt" in data:
             new_prompt = sanitize_text_input(data["prompt"], max_length=255)
             if not new_prompt:
                 return jsonify({"error": "Prompt cannot be empty"}), 400
-            entry.prompt = new_prompt
-            updated_fields.append("prompt")
+            values["prompt"] = new_prompt
         
         # Update answer if provided
         if "answer" in data:
             new_answer = sanitize_text_input(data["answer"], max_length=10000)
             if not new_answer:
                 return jsonify({"error": "Answer cannot be empty"}), 400
-            entry.answer = new_answer
-            updated_fields.append("answer")
+            values["answer"] = new_answer
         
         # Update tag if provided
         if "tag" in data:
-            new_tag = sanitize_text_input(data["tag"], max_length=150)
-            entry.tag = new_tag  # Tag can be empty
-            updated_fields.append("tag")
+            values["tag"] = sanitize_tag(data["tag"])  # Tag can be empty
         
-        if not updated_fields:
+        if not values:
             return jsonify({"error": "No valid fields provided for update"}), 400
         
+        # Update the entry with a single UPDATE ... RETURNING; it matches no
+        # row if the entry is missing, deleted or owned by someone else
+        entry = db.session.execute(
+            update(Journal)
+            .where(Journal.id == entry_id, Journal.user_id == current_user.id, Journal.deleted_at.is_(None))
+            .values(**values)
+            .returning(*ENTRY_COLUMNS)
+        ).mappings().one_or_none()
+        
+        if not entry:
+            db.session.rollback()
+            return jsonify({"error": "Entry not found or access denied"}), 404
+        
         # Save changes
         db.session.commit()
         
+        updated_fields = list(values)
         current_app.logger.info(f"Entry {entry_id} updated by user {current_user.id}: {updated_fields}")
         
         return jsonify({
             "message": "Entry updated successfully",
             "updated_fields": updated_fields,
-            "entry": {
-                "id": entry.id,
-                "prompt": entry.prompt,
-                "answer": entry.answer,
-                "tag": entry.tag,
-                "modality": entry.modality,
-                "updated_at": entry.updated_at.isoformat() if hasattr(entry, 'updated_at') else None
-            }
+            "entry": dict(entry)
         }), 200
     
     except Exception as e:
@@ -457,16 +601,17 @@ def delete_entry(entry_id):
         if entry_id <= 0:
             return jsonify({"error": "Invalid entry ID"}), 400
         
-        # Find the entry
-        entry = Journal.query.filter_by(id=entry_id, user_id=current_user.id) \
-                           .filter(Journal.deleted_at.is_(None)) \
-                           .first()
+        # Soft delete - set deleted_at timestamp in a single UPDATE
+        result = db.session.execute(
+            update(Journal)
+            .where(Journal.id == entry_id, Journal.user_id == current_user.id, Journal.deleted_at.is_(None))
+            .values(deleted_at=datetime.datetime.utcnow())
+        )
         
-        if not entry:
+        if not result.rowcount:
+            db.session.rollback()
             return jsonify({"error": "Entry not found or access denied"}), 404
         
-        # Soft delete - set deleted_at timestamp
-        entry.deleted_at = datetime.datetime.utcnow()
         db.session.commit()
         
         current_app.logger.info(f"Entry {entry_id} soft deleted by user {current_user.id}")
@@ -1,11 +1,14 @@
 import os
 from datetime import timedelta
+from sqlalchemy.pool import StaticPool
 
 class Config:
     """Base configuration class."""
     
     # Database
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Room for every statement the app compiles, so none is compiled twice
+    SQLALCHEMY_ENGINE_OPTIONS = {'query_cache_size': 1200}
     
     # Session
     SESSION_TYPE = 'filesystem'
@@ -13,11 +16,48 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     
+    # Password hashing (werkzeug method string, including the iteration count)
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:260000'
+    
     # File uploads
+    # Whole request cap: a 10MB image plus room for the multipart framing and
+    # form fields. Werkzeug rejects larger bodies with a 413 while reading them
+    # (from Content-Length when present); the image size itself is checked
+    # exactly once the file is read.
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     
-    # Rate limiting
+    # Rate limiting (REDIS_URL overrides the storage URL)
+    # Fixed windows cost one INCR plus an EXPIRE on key creation per request
+    # and the keys expire on their own, unlike the sorted sets of moving-window
     RATELIMIT_STORAGE_URL = "memory://"
+    RATELIMIT_STRATEGY = "fixed-window"
+    RATELIMIT_REQUIRE_SHARED_STORAGE = False
+    
+    # Caching of computed responses (Redis when REDIS_URL is set)
+    CACHE_DEFAULT_TIMEOUT = 3600
+    CACHE_MAX_ENTRIES = 1024  # per-process fallback only
+    CHAT_CONTEXT_CACHE_TIMEOUT = 300
+    
+    # Gemini Batch Mode for queued analytics requests (seconds)
+    ANALYTICS_BATCH_INTERVAL = 60
+    ANALYTICS_BATCH_POLL_INTERVAL = 30
+    
+    # Create tables on startup instead of running migrations. create_all never
+    # alters existing tables, so only the throwaway test database uses it
+    AUTO_CREATE_TABLES = False
+    
+    # Load the OCR model at startup instead of on the first image entry
+    PRELOAD_OCR = os.getenv('PRELOAD_OCR') == '1'
+    
+    # Background jobs for slow requests (0 workers runs jobs inline)
+    JOB_WORKERS = 4
+    JOB_RESULT_TIMEOUT = 3600
+    
+    # Group OCR jobs arriving within the window into one batched call (up to
+    # OCR_BATCH_SIZE images; 1 disables batching). Batches of fewer than 8
+    # images are read one by one, so this needs JOB_WORKERS of 8 or more.
+    OCR_BATCH_SIZE = 1
+    OCR_BATCH_WINDOW = 0.1
     
     @staticmethod
     def init_app(app):
@@ -41,6 +81,22 @@ class ProductionConfig(Config):
     SECRET_KEY = os.getenv('SECRET_KEY')
     SESSION_COOKIE_SECURE = True
     
+    # Connection pool per gunicorn worker. LIFO reuse lets idle connections
+    # beyond the busy set time out; pre-ping and recycling drop connections
+    # the database or a proxy closed. Size the pool so workers times
+    # (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under the server's max_connections.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 40)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'pool_use_lifo': True
+    }
+    
+    # Rate limit counters must be shared across gunicorn workers
+    RATELIMIT_REQUIRE_SHARED_STORAGE = True
+    
     # CORS for production
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '').split(',')
     
@@ -71,9 +127,19 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # One in-memory database per app, shared by every connection and thread
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
     SECRET_KEY = 'test-secret-key'
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    AUTO_CREATE_TABLES = True
+    JOB_WORKERS = 0
+    # A single PBKDF2 iteration; test passwords protect nothing
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1'
 
 # Configuration mapping
 config = {
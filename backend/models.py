@@ -4,7 +4,6 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column, relationship
 from sqlalchemy import Integer, String, ForeignKey, DateTime, Text
 from datetime import datetime
-import json
 
 class Base(DeclarativeBase):
     """Define Base class from which all sub-classes are inherited from
@@ -78,19 +77,52 @@ class Journal(db.Model):
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), nullable=False, index=True)
     user = relationship("User", back_populates="entry")
 
+# Composite indexes for the per-user queries that filter out soft-deleted entries
+# and order by recency (entry lists, analytics, chat context), the same for the
+# per-tag entry list, and for the modality group-by. On Postgres the first two
+# indexes are partial, so they only cover active entries.
+db.Index(
+    "ix_journal_user_active_created",
+    Journal.user_id, Journal.deleted_at, Journal.created_at.desc(),
+    postgresql_where=Journal.deleted_at.is_(None)
+)
+db.Index(
+    "ix_journal_user_tag_active_created",
+    Journal.user_id, Journal.tag, Journal.deleted_at, Journal.created_at.desc(),
+    postgresql_where=Journal.deleted_at.is_(None)
+)
+db.Index("ix_journal_user_modality", Journal.user_id, Journal.modality)
+
 class Conversation(db.Model):
-    chat: Mapped[str | None] = mapped_column(Text, nullable=True)
+    """Define the table model that stores a user's chat sessions with the AI
+    companion. The exchanged messages live in the ChatMessage table, so adding
+    a turn is an insert instead of rewriting the whole history.
+
+    Args:
+        db: model instance
+    """
     title: Mapped[str] = mapped_column(Text, nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), nullable=False, index=True)
     user = relationship("User", back_populates="conversations")
+    messages = relationship("ChatMessage", back_populates="conversation", cascade="all, delete-orphan",
+                            order_by="ChatMessage.id")
     
-    def get_chat_data(self):
-        if not self.chat:
-            return []
-        try:
-            return json.loads(self.chat)
-        except json.JSONDecodeError:
-            return []
-    
-    def set_chat_data(self, data):
-        self.chat = json.dumps(data)
\ No newline at end of file
+    # Denormalized from the messages so conversations can be listed without loading them
+    last_message_preview: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+class ChatMessage(db.Model):
+    """Define the table model that stores one message of a conversation
+    role is either "user" or "model", matching the Gemini chat roles.
+
+    Args:
+        db: model instance
+    """
+    conversation_id: Mapped[int] = mapped_column(ForeignKey('conversation.id'), nullable=False)
+    role: Mapped[str] = mapped_column(String(10), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    conversation = relationship("Conversation", back_populates="messages")
+
+# Messages are always read per conversation in insertion order; the id is
+# monotonic, so it is the one ordering key used everywhere
+db.Index("ix_chatmessage_conversation_id", ChatMessage.conversation_id, ChatMessage.id)
@@ -0,0 +1,185 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+BATCH_MODEL = "gemini-2.0-flash"
+
+# Terminal states reported by the Gemini batch API
+_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED"
+}
+
+# Terminal states that come with a results file
+_SUCCESS_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+
+def _response_text(response):
+    """Extract the generated text from one batch result line."""
+    try:
+        parts = response["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+class AnalyticsBatchQueue:
+    """Collect analytics prompts and submit them through Gemini Batch Mode.
+
+    Every interval, the prompts queued since the last flush are written to a
+    JSONL file, uploaded, and submitted as one batch job. Batch jobs can take
+    hours, so submitting never waits for earlier jobs: the same daemon thread
+    polls all open jobs every poll_interval and hands each result to the
+    on_result callback inside an app context. The thread exits once nothing
+    is queued or open.
+    """
+
+    def __init__(self, app, client_factory, on_result, interval=60, poll_interval=30,
+                 request_config=None):
+        self.app = app
+        self.client_factory = client_factory
+        self.on_result = on_result
+        self.interval = interval
+        self.poll_interval = poll_interval
+        # Shared request fields (system instruction, generation config)
+        self.request_config = request_config or {}
+        self._pending = {}
+        self._in_flight = {}
+        # Open batch job name -> the prompts it holds (worker thread only)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def enqueue(self, key, prompt, context=None):
+        """Queue a prompt for the next batch.
+
+        Returns:
+            bool: False if the key is already queued or being processed
+        """
+        with self._lock:
+            if key in self._pending or key in self._in_flight:
+                return False
+            self._pending[key] = (prompt, context)
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="analytics-batch", daemon=True)
+                self._worker.start()
+        return True
+
+    def _run(self):
+        """Flush pending prompts every interval and poll open jobs until both are empty."""
+        next_flush = time.monotonic() + self.interval
+        next_poll = time.monotonic() + self.poll_interval
+        while True:
+            time.sleep(max(0.0, min(next_flush, next_poll) - time.monotonic()))
+
+            now = time.monotonic()
+            if now >= next_flush:
+                next_flush = now + self.interval
+                self._flush()
+            if now >= next_poll:
+                next_poll = now + self.poll_interval
+                self._poll_jobs()
+
+            with self._lock:
+                if not self._pending and not self._jobs:
+                    self._worker = None
+                    return
+
+    def _release(self, batch):
+        """Allow the keys of a finished or failed batch to be queued again."""
+        with self._lock:
+            for key in batch:
+                self._in_flight.pop(key, None)
+
+    def _flush(self):
+        """Submit everything queued since the last flush as one batch job."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            self._in_flight.update(batch)
+
+        try:
+            with self.app.app_context():
+                job_name = self._submit(batch)
+        except Exception as e:
+            self.app.logger.error(f"Analytics batch failed: {e}")
+            self._release(batch)
+            return
+
+        self._jobs[job_name] = batch
+
+    def _poll_jobs(self):
+        """Check every open job once and dispatch the results of finished ones."""
+        for job_name, batch in list(self._jobs.items()):
+            try:
+                with self.app.app_context():
+                    done = self._collect(job_name, batch)
+            except Exception as e:
+                self.app.logger.error(f"Analytics batch {job_name} failed: {e}")
+                done = True
+
+            if done:
+                del self._jobs[job_name]
+                self._release(batch)
+
+    def _submit(self, batch):
+        """Upload one JSONL batch and create its job.
+
+        Returns:
+            str: The name of the created batch job
+        """
+        client = self.client_factory()
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as batch_file:
+            for key, (prompt, _) in batch.items():
+                batch_file.write(json.dumps({
+                    "key": key,
+                    "request": {"contents": [{"parts": [{"text": prompt}]}], **self.request_config}
+                }) + "\n")
+            batch_path = batch_file.name
+
+        try:
+            uploaded = client.files.upload(file=batch_path, config={"mime_type": "jsonl"})
+        finally:
+            os.remove(batch_path)
+
+        job = client.batches.create(model=BATCH_MODEL, src=uploaded.name)
+        self.app.logger.info(f"Submitted analytics batch {job.name} with {len(batch)} requests")
+        return job.name
+
+    def _collect(self, job_name, batch):
+        """Dispatch the results of one job if it has finished.
+
+        Returns:
+            bool: True once the job has reached a terminal state
+        """
+        client = self.client_factory()
+        job = client.batches.get(name=job_name)
+
+        if job.state.name not in _DONE_STATES:
+            return False
+
+        if job.state.name not in _SUCCESS_STATES:
+            self.app.logger.warning(f"Analytics batch {job_name} ended with state {job.state.name}")
+            return True
+
+        content = client.files.download(file=job.dest.file_name)
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            key = item.get("key")
+            if key not in batch:
+                continue
+
+            try:
+                self.on_result(key, _response_text(item.get("response")), batch[key][1])
+            except Exception as e:
+                self.app.logger.warning(f"Failed to store batch result {key}: {e}")
+        return True
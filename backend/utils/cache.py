@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+class ResultCache:
+    """Small key/value cache for computed API responses.
+
+    Uses Redis when a URL is given so every worker shares the same entries,
+    otherwise falls back to a per-process dictionary with expiry times. Most
+    keys embed data versions or job ids and are never read again, so that
+    dictionary holds at most max_entries: when full, expired entries are
+    dropped first, then the least recently used ones.
+    """
+
+    def __init__(self, redis_url=None, default_timeout=3600, max_entries=1024):
+        self.default_timeout = default_timeout
+        self.max_entries = max_entries
+        self._redis = None
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        if self._redis is not None:
+            raw = self._redis.get(key)
+            return json.loads(raw) if raw else None
+
+        with self._lock:
+            item = self._store.get(key)
+            if not item:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._store[key]
+                return None
+            self._store.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        """Store a JSON-serializable value under key for timeout seconds."""
+        timeout = self.default_timeout if timeout is None else timeout
+        if timeout <= 0:
+            return
+
+        if self._redis is not None:
+            self._redis.set(key, json.dumps(value), ex=timeout)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._store[key] = (now + timeout, value)
+            self._store.move_to_end(key)
+
+            if len(self._store) > self.max_entries:
+                for stale_key in [k for k, (expires_at, _) in self._store.items() if expires_at < now]:
+                    del self._store[stale_key]
+                while len(self._store) > self.max_entries:
+                    self._store.popitem(last=False)
+
+def init_cache(app):
+    """Attach a result cache to the application."""
+    app.extensions['result_cache'] = ResultCache(
+        redis_url=os.getenv('REDIS_URL'),
+        default_timeout=app.config.get('CACHE_DEFAULT_TIMEOUT', 3600),
+        max_entries=app.config.get('CACHE_MAX_ENTRIES', 1024)
+    )
+
+def get_cache():
+    """Return the result cache of the current application."""
+    return current_app.extensions['result_cache']
@@ -6,7 +6,8 @@ def validate_environment_variables():
     required_vars = [
         'SQLALCHEMY_DATABASE_URI',
         'SECRET_KEY',
-        'LOCAL_DOMAIN'
+        'LOCAL_DOMAIN',
+        'GEMINI_API_KEY'
     ]
     
     missing_vars = []
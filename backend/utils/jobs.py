@@ -0,0 +1,60 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from backend.utils.cache import get_cache
+
+class JobRunner:
+    """Run slow work off the request thread and track it in the result cache.
+
+    Job records live in the result cache under "<prefix>:<job_id>", so with
+    Redis any worker can answer a status poll. Jobs run inside an app context
+    of the owning application. With max_workers=0 jobs run inline, which keeps
+    tests deterministic.
+    """
+
+    def __init__(self, app, max_workers=4, timeout=3600):
+        self.app = app
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job") if max_workers else None
+
+    def submit(self, prefix, owner_id, func, *args):
+        """Queue func(*args) and return the new job id."""
+        job_id = uuid.uuid4().hex
+        key = f"{prefix}:{job_id}"
+        get_cache().set(key, {"status": "pending", "owner_id": owner_id}, timeout=self.timeout)
+
+        if self._executor is None:
+            self._run(key, owner_id, func, args)
+        else:
+            self._executor.submit(self._run, key, owner_id, func, args)
+        return job_id
+
+    def get(self, prefix, job_id, owner_id):
+        """Return the job record, or None if it is unknown or owned by someone else."""
+        job = get_cache().get(f"{prefix}:{job_id}")
+        if not job or job.get("owner_id") != owner_id:
+            return None
+        return job
+
+    def _run(self, key, owner_id, func, args):
+        with self.app.app_context():
+            cache = get_cache()
+            cache.set(key, {"status": "running", "owner_id": owner_id}, timeout=self.timeout)
+            try:
+                result = func(*args)
+                cache.set(key, {"status": "completed", "owner_id": owner_id, "result": result}, timeout=self.timeout)
+            except Exception as e:
+                self.app.logger.error(f"Background job {key} failed: {e}")
+                cache.set(key, {"status": "failed", "owner_id": owner_id}, timeout=self.timeout)
+
+def init_jobs(app):
+    """Attach a background job runner to the application."""
+    app.extensions['job_runner'] = JobRunner(
+        app,
+        max_workers=app.config.get('JOB_WORKERS', 4),
+        timeout=app.config.get('JOB_RESULT_TIMEOUT', 3600)
+    )
+
+def get_job_runner():
+    """Return the background job runner of the current application."""
+    return current_app.extensions['job_runner']
@@ -0,0 +1,21 @@
+import orjson
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson so responses and request bodies are
+    encoded and decoded in C.
+
+    datetime values are serialized natively as ISO 8601 strings, so views can
+    return them without calling isoformat() themselves.
+
+    Types orjson does not handle natively (Decimal, objects with __html__)
+    fall back to Flask's default conversion.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
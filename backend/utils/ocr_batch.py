@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class OCRBatcher:
+    """Group OCR requests that arrive together into one readtext_batched call.
+
+    Callers block in readtext() while a single daemon thread collects up to
+    max_batch images arriving within window seconds of the first one. Batched
+    inference only pays off for larger groups, so fewer than min_batched
+    images (or a batch easyocr rejects, e.g. mixed image sizes) are read one
+    by one. The reader is only ever used from the batching thread.
+    """
+
+    def __init__(self, reader_factory, max_batch=16, window=0.1, min_batched=8):
+        self.reader_factory = reader_factory
+        self.max_batch = max_batch
+        self.window = window
+        self.min_batched = min_batched
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def readtext(self, image):
+        """Return the readtext() result for image (a path or an array)."""
+        future = Future()
+        self._queue.put((image, future))
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="ocr-batch", daemon=True)
+                self._worker.start()
+        return future.result()
+
+    def _run(self):
+        """Collect and process batches forever."""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(items)
+
+    def _process(self, items):
+        """Run OCR for one batch and resolve each caller's future."""
+        try:
+            reader = self.reader_factory()
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        if len(items) >= self.min_batched:
+            try:
+                results = reader.readtext_batched([image for image, _ in items], batch_size=len(items))
+            except Exception:
+                results = None
+            if results is not None and len(results) == len(items):
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+                return
+
+        for image, future in items:
+            try:
+                future.set_result(reader.readtext(image))
+            except Exception as e:
+                future.set_exception(e)
@@ -0,0 +1,52 @@
+import re
+
+try:
+    import re2
+except ImportError:  # optional, linear-time matcher
+    re2 = None
+
+# Patterns for potentially sensitive information, combined into a single
+# alternation so each text is scanned once. Group names map to placeholders.
+# The patterns are pure ASCII, so re.ASCII keeps \d, \b and case folding on
+# the ASCII fast path.
+_SENSITIVE_RE = re.compile(
+    r'(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+    r'|(?P<phone1>\b\d{3}[-.]?\d{3}[-.]?\d{4}\b)'
+    r'|(?P<phone2>\(\d{3}\)\s?\d{3}[-.]?\d{4}\b)'
+    r'|(?P<ssn>\b\d{3}-\d{2}-\d{4}\b)'
+    r'|(?P<card>\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b)'
+    r'|(?P<address>\b\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln)\b)',
+    re.IGNORECASE | re.ASCII
+)
+_SENSITIVE_REPLACEMENTS = {
+    "email": "[EMAIL]",
+    "phone1": "[PHONE]",
+    "phone2": "[PHONE]",
+    "ssn": "[SSN]",
+    "card": "[CARD]",
+    "address": "[ADDRESS]"
+}
+
+# Cheap probe run before the full pattern
+_DIGIT_RE = re.compile(r'\d', re.ASCII)
+
+# When google-re2 is installed, the same alternation is used as a linear-time
+# detector so text without sensitive data never reaches the backtracking
+# engine. Substitution stays on the stdlib pattern, which is faster than
+# re2 when a Python callback runs per match.
+_SENSITIVE_DETECTOR = re2.compile('(?i)' + _SENSITIVE_RE.pattern) if re2 else None
+
+def remove_sensitive_info(text):
+    """Remove potentially sensitive information from text."""
+    if not text:
+        return text
+    
+    # Every pattern needs an "@" or a digit, so most text can skip the scan
+    if '@' not in text and not _DIGIT_RE.search(text):
+        return text.strip()
+    
+    if _SENSITIVE_DETECTOR is not None and not _SENSITIVE_DETECTOR.search(text):
+        return text.strip()
+    
+    # Emails, phone numbers, SSNs, card numbers and street addresses
+    return _SENSITIVE_RE.sub(lambda m: _SENSITIVE_REPLACEMENTS[m.lastgroup], text).strip()
@@ -0,0 +1,25 @@
+import os
+import sqlite3
+import sys
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Add project root to Python path once for every test module
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Keep rate limit counters and cached results in each process, so parallel
+# workers (pytest -n auto) never share state through Redis
+os.environ.pop('REDIS_URL', None)
+
+@event.listens_for(Engine, "connect")
+def set_test_sqlite_pragmas(dbapi_connection, connection_record):
+    """Skip durability bookkeeping on the throwaway test databases."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
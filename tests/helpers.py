@@ -0,0 +1,117 @@
+import unittest
+from flask_sqlalchemy.session import Session
+from flask_login.utils import _create_identifier
+from backend.app import create_app, db
+from backend.utils.cache import ResultCache
+
+class TransactionSession(Session):
+    """Session that always uses the connection it was bound to.
+
+    Flask-SQLAlchemy picks the app's engine in get_bind(), which would bypass
+    the per-test transaction.
+    """
+    
+    def get_bind(self, *args, **kwargs):
+        return self.bind
+
+class RollbackMixin:
+    """Run each test inside a transaction that is rolled back afterwards.
+    
+    The schema is created once with the app; commits made by the code under
+    test only release a SAVEPOINT, so nothing outlives the test.
+    """
+    
+    def begin_test_transaction(self):
+        """Bind db.session to a connection with an open outer transaction."""
+        self.connection = db.engine.connect()
+        self.transaction = self.connection.begin()
+        # pysqlite defers BEGIN, which would let the first RELEASE SAVEPOINT commit
+        self.connection.exec_driver_sql("BEGIN")
+        
+        self.app_session = db.session
+        db.session = db._make_scoped_session({
+            "class_": TransactionSession,
+            "bind": self.connection,
+            "join_transaction_mode": "create_savepoint"
+        })
+    
+    def rollback_test_transaction(self):
+        """Discard everything written since begin_test_transaction()."""
+        db.session.remove()
+        db.session = self.app_session
+        self.transaction.rollback()
+        self.connection.close()
+
+class AppTestCase(RollbackMixin, unittest.TestCase):
+    """Base test case: one app, and with it one in-memory database, per class.
+    
+    Data committed in seed_database() is shared by every test of the class.
+    Each test gets a fresh client and app context, runs inside a rolled-back
+    transaction, and starts with an empty result cache and rate limits.
+    """
+    
+    config_name = 'testing'
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.app = create_app(cls.config_name)
+        cls.configure_app(cls.app)
+        with cls.app.app_context():
+            cls.seed_database()
+            db.session.remove()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Release the in-memory database."""
+        with cls.app.app_context():
+            db.engine.dispose()
+        super().tearDownClass()
+    
+    @classmethod
+    def configure_app(cls, app):
+        """Adjust the freshly created app; called once per class."""
+        app.config['WTF_CSRF_ENABLED'] = False
+    
+    @classmethod
+    def seed_database(cls):
+        """Commit the data every test of the class starts from."""
+    
+    def setUp(self):
+        """Run the test in its own app context and rolled-back transaction."""
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.begin_test_transaction()
+        
+        # The app is shared, so its cache and rate limit counters must not
+        # leak between tests
+        self.app.extensions['result_cache'] = ResultCache()
+        self.reset_rate_limits()
+    
+    def tearDown(self):
+        """Roll back everything the test wrote."""
+        self.rollback_test_transaction()
+        self.app_context.pop()
+    
+    def reset_rate_limits(self):
+        """Clear the limiter counters."""
+        for limiter in self.app.extensions.get('limiter', ()):
+            limiter.reset()
+    
+    def login(self, user_id):
+        """Log user_id in on this test's client."""
+        login_session(self.app, self.client, user_id)
+
+def login_session(app, client, user_id):
+    """Log user_id in by writing Flask-Login's session keys directly.
+    
+    Skips the login endpoint (covered by the auth tests) and its password
+    check. "_id" satisfies the app's strong session protection.
+    """
+    with app.test_request_context(environ_base=client.environ_base):
+        identifier = _create_identifier()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+        sess['_id'] = identifier
@@ -1,67 +1,87 @@
-import sys
 import os
+import time
 import unittest
-import json
+import orjson
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta, timezone
 
-# Add project root to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
-
-from flask_testing import TestCase
+from werkzeug.security import generate_password_hash
+from sqlalchemy import insert
 from backend.models import User, Journal
-from backend.app import create_app, db
+from backend.app import db
+from backend.utils.cache import ResultCache
+from tests.helpers import AppTestCase
+import backend.bp.analytics as analytics
+
+# Hashing is deliberately slow, so do it once rather than in every setUp
+TEST_PASSWORD_HASH = generate_password_hash('testpassword')
+TEST_PASSWORD2_HASH = generate_password_hash('testpassword2')
+
+DEFAULT_AI_RESPONSE = {
+    "patterns": ["Pattern"],
+    "insights": ["Insight"],
+    "suggested_prompts": ["Prompt"]
+}
 
-class AnalyticsTestCase(TestCase):
+# Keys every completed /analytics/analyze response carries
+ANALYZE_RESPONSE_KEYS = {'message', 'results', 'entries_analyzed', 'date_range', 'analysis_timestamp'}
+
+class AnalyticsTestCase(AppTestCase):
     """Test suite for analytics features."""
     
-    def create_app(self):
-        """Create test app with testing configuration."""
-        app = create_app('testing')
-        app.config['WTF_CSRF_ENABLED'] = False
-        return app
+    @classmethod
+    def seed_database(cls):
+        """Create the test user and its entries once for the whole class."""
+        # One reference time for all seeded timestamps
+        cls.now = datetime.now(timezone.utc)
+        cls.test_user_id = cls.create_test_user()
+        cls.create_test_entries(cls.test_user_id)
     
     def setUp(self):
-        """Set up fresh database for each test."""
-        db.create_all()
-        self.create_and_login_user()
-        self.create_test_entries()
+        """Log the seeded user in with the AI service mocked.
+        
+        The seed data was committed in setUpClass, so it is visible to every
+        test, while whatever a test writes disappears with the rollback.
+        """
+        super().setUp()
+        
+        # One AI mock per test, swapped in directly rather than via patch()
+        self.real_call_ai_service = analytics.call_ai_service
+        self.mock_ai = MagicMock(return_value=DEFAULT_AI_RESPONSE)
+        analytics.call_ai_service = self.mock_ai
+        
+        self.test_user = db.session.get(User, self.test_user_id)
+        self.login_test_user()
     
     def tearDown(self):
-        """Clean up after each test."""
-        db.session.remove()
-        db.drop_all()
-    
-    def create_and_login_user(self):
-        """Create a test user and login."""
-        from werkzeug.security import generate_password_hash
-        self.test_user = User(
+        """Restore the AI service and roll back everything the test wrote."""
+        analytics.call_ai_service = self.real_call_ai_service
+        super().tearDown()
+    
+    @classmethod
+    def create_test_user(cls):
+        """Create the test user and return its id."""
+        user = User(
             username='testuser',
             email='test@example.com',
-            password=generate_password_hash('testpassword'),
-            last_activity_date=datetime.now(timezone.utc) - timedelta(days=30)
+            password=TEST_PASSWORD_HASH,
+            last_activity_date=cls.now - timedelta(days=30)
         )
-        db.session.add(self.test_user)
+        db.session.add(user)
         db.session.commit()
-        
-        # Login user
-        login_data = {
-            'identifier': 'testuser',
-            'password': 'testpassword'
-        }
-        self.client.post(
-            '/auth/login',
-            data=json.dumps(login_data),
-            content_type='application/json'
-        )
+        return user.id
+    
+    def login_test_user(self):
+        """Log the test user in."""
+        self.login(self.test_user.id)
     
-    def create_test_entries(self):
+    @classmethod
+    def create_test_entries(cls, user_id):
         """Create test journal entries for analytics."""
         # Create entries spanning different time periods
-        now = datetime.now(timezone.utc)
+        now = cls.now
         
-        self.test_entries = [
+        test_entries = [
             # Recent entries (within 30 days)
             {
                 'prompt': 'How was your day today?',
@@ -96,22 +116,18 @@ class AnalyticsTestCase(TestCase):
             }
         ]
         
-        for entry_data in self.test_entries:
-            entry = Journal(
-                prompt=entry_data['prompt'],
-                answer=entry_data['answer'],
-                modality='text',
-                user_id=self.test_user.id,
-                created_at=entry_data['created_at']
-            )
-            db.session.add(entry)
+        # One multi-row INSERT instead of a unit-of-work flush per entry
+        db.session.execute(insert(Journal), [
+            {**entry_data, 'modality': 'text', 'user_id': user_id}
+            for entry_data in test_entries
+        ])
         db.session.commit()
     
     def get_response_data(self, response):
         """Helper to decode JSON response with error handling."""
         try:
-            return json.loads(response.data.decode())
-        except json.JSONDecodeError:
+            return orjson.loads(response.data)
+        except orjson.JSONDecodeError:
             return {
                 'error': 'JSON_DECODE_ERROR',
                 'raw_data': response.data.decode(),
@@ -120,11 +136,10 @@ class AnalyticsTestCase(TestCase):
     
     # === BASIC ANALYTICS TESTS ===
     
-    @patch('backend.bp.analytics.call_ai_service')
-    def test_analyze_entries_success(self, mock_ai_service):
+    def test_analyze_entries_success(self):
         """Test successful analytics analysis."""
         # Mock AI service response
-        mock_ai_service.return_value = {
+        self.mock_ai.return_value = {
             "patterns": [
                 "Regular reflection on learning and growth",
                 "Positive mindset and gratitude practice",
@@ -147,93 +162,93 @@ class AnalyticsTestCase(TestCase):
         data = self.get_response_data(response)
         
         self.assertEqual(data['message'], 'Analysis completed successfully')
-        self.assertIn('results', data)
-        self.assertIn('entries_analyzed', data)
+        self.assertLessEqual(ANALYZE_RESPONSE_KEYS, data.keys())
         self.assertGreater(data['entries_analyzed'], 0)
         
         # Check AI response structure
-        results = data['results']
-        self.assertIn('patterns', results)
-        self.assertIn('insights', results)
-        self.assertIn('suggested_prompts', results)
-        self.assertEqual(len(results['patterns']), 3)
-        self.assertEqual(len(results['insights']), 2)
-        self.assertEqual(len(results['suggested_prompts']), 3)
+        self.assertEqual(
+            {key: len(value) for key, value in data['results'].items()},
+            {'patterns': 3, 'insights': 2, 'suggested_prompts': 3}
+        )
     
     def test_analyze_entries_custom_timeframe(self):
         """Test analytics with custom timeframe."""
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Recent activity pattern"],
-                "insights": ["Short-term insight"],
-                "suggested_prompts": ["Recent prompt suggestion"]
-            }
-            
-            # Test 7-day analysis
-            response = self.client.get('/analytics/analyze?days=7')
-            
-            self.assertEqual(response.status_code, 200)
-            data = self.get_response_data(response)
-            
-            self.assertIn('date_range', data)
-            self.assertEqual(data['date_range']['days'], 7)
-            # Should analyze fewer entries (only last 7 days)
-            self.assertLessEqual(data['entries_analyzed'], 5)
+        self.mock_ai.return_value = {
+            "patterns": ["Recent activity pattern"],
+            "insights": ["Short-term insight"],
+            "suggested_prompts": ["Recent prompt suggestion"]
+        }
+        
+        # Test 7-day analysis
+        response = self.client.get('/analytics/analyze?days=7')
+        
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        
+        self.assertIn('date_range', data)
+        self.assertEqual(data['date_range']['days'], 7)
+        # Should analyze fewer entries (only last 7 days)
+        self.assertLessEqual(data['entries_analyzed'], 5)
     
     def test_analyze_entries_custom_max_entries(self):
         """Test analytics with custom max entries limit."""
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Pattern"],
-                "insights": ["Insight"],
-                "suggested_prompts": ["Prompt"]
-            }
-            
-            # Test with max 3 entries
-            response = self.client.get('/analytics/analyze?max_entries=3')
-            
-            self.assertEqual(response.status_code, 200)
-            data = self.get_response_data(response)
-            
-            # Should limit entries analyzed
-            self.assertLessEqual(data['entries_analyzed'], 3)
-    
-    def test_analyze_entries_invalid_parameters(self):
-        """Test analytics with invalid parameters."""
-        # Test invalid days parameter
-        response = self.client.get('/analytics/analyze?days=400')  # Too many days
-        self.assertEqual(response.status_code, 400)
-        data = self.get_response_data(response)
-        self.assertIn('error', data)
+        # Test with max 3 entries
+        response = self.client.get('/analytics/analyze?max_entries=3')
         
-        # Test invalid max_entries parameter
-        response = self.client.get('/analytics/analyze?max_entries=100')  # Too many entries
-        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.status_code, 200)
         data = self.get_response_data(response)
-        self.assertIn('error', data)
+        
+        # Should limit entries analyzed
+        self.assertLessEqual(data['entries_analyzed'], 3)
     
-    def test_analyze_entries_no_data(self):
-        """Test analytics when user has no entries."""
+    def test_analytics_no_data(self):
+        """Test every analytics endpoint when user has no entries."""
         # Remove all entries for this user
         Journal.query.filter_by(user_id=self.test_user.id).delete()
         db.session.commit()
         
-        response = self.client.get('/analytics/analyze')
+        def check_analyze(data):
+            self.assertEqual(data['entries_analyzed'], 0)
+            self.assertIn('results', data)
+            # Should provide helpful fallback content
+            self.assertIn('suggested_prompts', data['results'])
         
-        self.assertEqual(response.status_code, 200)
-        data = self.get_response_data(response)
+        def check_mood_trends(data):
+            self.assertEqual(data['trends']['total_entries'], 0)
+            self.assertEqual(data['trends']['active_days'], 0)
         
-        self.assertEqual(data['entries_analyzed'], 0)
-        self.assertIn('results', data)
-        # Should provide helpful fallback content
-        self.assertIn('suggested_prompts', data['results'])
+        def check_summary(data):
+            summary = data['summary']
+            self.assertEqual(summary['total_entries'], 0)
+            self.assertEqual(summary['entries_this_month'], 0)
+            self.assertIsNone(summary['most_active_day'])
+        
+        test_cases = [
+            ('/analytics/analyze', check_analyze),
+            ('/analytics/mood-trends', check_mood_trends),
+            ('/analytics/summary', check_summary)
+        ]
+        
+        for endpoint, check in test_cases:
+            with self.subTest(endpoint=endpoint):
+                response = self.client.get(endpoint)
+                self.assertEqual(response.status_code, 200)
+                check(self.get_response_data(response))
     
     def test_analyze_entries_insufficient_data(self):
         """Test analytics with insufficient data (< 3 entries)."""
-        # Keep only 2 entries
-        entries = Journal.query.filter_by(user_id=self.test_user.id).all()
-        for entry in entries[2:]:
-            db.session.delete(entry)
+        # Keep only the 2 oldest rows (both in the 30-day window), in one DELETE
+        keep_ids = (
+            db.session.query(Journal.id)
+            .filter_by(user_id=self.test_user.id)
+            .order_by(Journal.id)
+            .limit(2)
+            .scalar_subquery()
+        )
+        Journal.query.filter(
+            Journal.user_id == self.test_user.id,
+            Journal.id.not_in(keep_ids)
+        ).delete(synchronize_session=False)
         db.session.commit()
         
         response = self.client.get('/analytics/analyze')
@@ -247,6 +262,8 @@ class AnalyticsTestCase(TestCase):
     @patch.dict(os.environ, {}, clear=True)  # Remove GEMINI_API_KEY
     def test_analyze_entries_no_api_key(self):
         """Test analytics when API key is not configured."""
+        self.mock_ai.side_effect = self.real_call_ai_service
+        
         response = self.client.get('/analytics/analyze')
         
         # Your implementation uses fallback analysis when API key is missing
@@ -256,11 +273,10 @@ class AnalyticsTestCase(TestCase):
         # Should provide fallback content
         self.assertIn('patterns', data['results'])
     
-    @patch('backend.bp.analytics.call_ai_service')
-    def test_analyze_entries_ai_service_failure(self, mock_ai_service):
+    def test_analyze_entries_ai_service_failure(self):
         """Test analytics when AI service fails."""
         # Mock AI service to raise an exception
-        mock_ai_service.side_effect = ValueError("AI service quota exceeded")
+        self.mock_ai.side_effect = ValueError("AI service quota exceeded")
         
         response = self.client.get('/analytics/analyze')
         
@@ -269,11 +285,10 @@ class AnalyticsTestCase(TestCase):
         # Your implementation returns a different error message
         self.assertIn('high demand', data['error'].lower())
     
-    @patch('backend.bp.analytics.call_ai_service')
-    def test_analyze_entries_ai_fallback(self, mock_ai_service):
+    def test_analyze_entries_ai_fallback(self):
         """Test analytics fallback when AI service returns invalid data."""
         # Mock AI service to return invalid data
-        mock_ai_service.side_effect = ValueError("Invalid response")
+        self.mock_ai.side_effect = ValueError("Invalid response")
         
         response = self.client.get('/analytics/analyze')
         
@@ -283,24 +298,181 @@ class AnalyticsTestCase(TestCase):
         self.assertIn('results', data)
         # Should contain fallback content - update to match your actual fallback text
         self.assertIn('dedication to self-reflection', data['results']['patterns'][0].lower())
+        # The fallback is neither cached nor tagged
+        self.assertNotIn('ETag', response.headers)
     
     def test_analyze_entries_force_refresh(self):
         """Test analytics with force refresh parameter."""
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Refreshed pattern"],
-                "insights": ["Refreshed insight"],
-                "suggested_prompts": ["Refreshed prompt"]
-            }
-            
-            response = self.client.get('/analytics/analyze?force_refresh=true')
-            
-            self.assertEqual(response.status_code, 200)
-            data = self.get_response_data(response)
-            
-            # Should process normally with force refresh
-            self.assertIn('results', data)
+        self.mock_ai.return_value = {
+            "patterns": ["Refreshed pattern"],
+            "insights": ["Refreshed insight"],
+            "suggested_prompts": ["Refreshed prompt"]
+        }
+        
+        response = self.client.get('/analytics/analyze?force_refresh=true')
+        
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        
+        # Should process normally with force refresh
+        self.assertIn('results', data)
     
+    def test_analyze_entries_cached(self):
+        """Test repeat analyses are served from cache until an entry changes."""
+        self.assertEqual(self.client.get('/analytics/analyze').status_code, 200)
+        self.assertEqual(self.client.get('/analytics/analyze').status_code, 200)
+        self.assertEqual(self.mock_ai.call_count, 1)
+
+        # Editing an entry changes the cache key
+        entry = Journal.query.filter_by(user_id=self.test_user.id).first()
+        entry.answer = "An edited answer about my week"
+        db.session.commit()
+
+        self.assertEqual(self.client.get('/analytics/analyze').status_code, 200)
+        self.assertEqual(self.mock_ai.call_count, 2)
+
+    def test_analyze_entries_not_modified(self):
+        """Test a matching If-None-Match header returns 304 without reanalyzing."""
+        response = self.client.get('/analytics/analyze')
+        etag = response.headers.get('ETag')
+        self.assertIsNotNone(etag)
+
+        response = self.client.get('/analytics/analyze', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.mock_ai.call_count, 1)
+
+    def test_analyze_entries_miss_reads_cache_once(self):
+        """Test a cache miss is looked up once, not again to decide on the ETag."""
+        cache = self.app.extensions['result_cache']
+        cache.get = MagicMock(wraps=cache.get)
+
+        response = self.client.get('/analytics/analyze')
+
+        self.assertIn('ETag', response.headers)
+        self.assertEqual(cache.get.call_count, 1)
+
+    def test_result_cache_is_bounded(self):
+        """Test the in-process cache drops expired, then least recently used, entries."""
+        cache = ResultCache(max_entries=3)
+        cache.set('expired', 1, timeout=0.01)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        time.sleep(0.02)
+
+        # Full: the expired entry goes first
+        cache.set('c', 'C')
+        self.assertEqual(len(cache._store), 3)
+        self.assertIsNone(cache.get('expired'))
+
+        # Then the least recently used one ('a' was just read)
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('d', 'D')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(key) for key in ('a', 'c', 'd')], ['A', 'C', 'D'])
+
+    @patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'})
+    @patch('backend.bp.analytics.get_batch_queue')
+    def test_analyze_entries_batch_mode(self, mock_get_queue):
+        """Test batch mode queues the analysis and serves the cached result once ready."""
+        response = self.client.get('/analytics/analyze?mode=batch')
+
+        self.assertEqual(response.status_code, 202)
+        data = self.get_response_data(response)
+        self.assertEqual(data['status'], 'queued')
+
+        key, prompt, context = mock_get_queue.return_value.enqueue.call_args[0]
+        self.assertTrue(key.startswith(f"user_{self.test_user.id}_analytics_"))
+        self.assertIn('Journal entries to analyze', prompt)
+
+        # Simulate the batch poller delivering the result
+        from backend.bp.analytics import store_batch_result
+        store_batch_result(key, '{"patterns": ["Batch pattern"]}', context)
+
+        response = self.client.get('/analytics/analyze?mode=batch')
+
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        self.assertEqual(data['results']['patterns'], ['Batch pattern'])
+
+    def test_batch_queue_submits_while_jobs_are_open(self):
+        """Test a new flush is submitted while an earlier batch job is still running."""
+        from types import SimpleNamespace
+        from backend.utils.analytics_batch import AnalyticsBatchQueue
+
+        states = {}
+        client = MagicMock()
+        client.files.upload.return_value = SimpleNamespace(name='files/input')
+
+        def create_job(model, src):
+            name = f"batches/{len(states) + 1}"
+            states[name] = 'JOB_STATE_RUNNING'
+            return SimpleNamespace(name=name)
+
+        def get_job(name):
+            return SimpleNamespace(state=SimpleNamespace(name=states[name]),
+                                   dest=SimpleNamespace(file_name=f"{name}/output"))
+
+        def download(file):
+            key = 'first' if file.startswith('batches/1') else 'second'
+            line = {"key": key, "response": {"candidates": [{"content": {"parts": [{"text": key}]}}]}}
+            return orjson.dumps(line)
+
+        client.batches.create.side_effect = create_job
+        client.batches.get.side_effect = get_job
+        client.files.download.side_effect = download
+
+        results = []
+        queue = AnalyticsBatchQueue(self.app, lambda: client, lambda key, text, context: results.append(text),
+                                    interval=0.01, poll_interval=0.01)
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 5
+            while not condition():
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.005)
+
+        self.assertTrue(queue.enqueue('first', 'prompt 1'))
+        wait_for(lambda: len(states) == 1)
+        self.assertFalse(queue.enqueue('first', 'prompt 1'))
+
+        # The first job is still running, yet the next prompt gets its own job
+        self.assertTrue(queue.enqueue('second', 'prompt 2'))
+        wait_for(lambda: len(states) == 2)
+        self.assertEqual(states['batches/1'], 'JOB_STATE_RUNNING')
+
+        states['batches/2'] = 'JOB_STATE_SUCCEEDED'
+        wait_for(lambda: results == ['second'])
+        states['batches/1'] = 'JOB_STATE_SUCCEEDED'
+        wait_for(lambda: results == ['second', 'first'])
+
+        # Both keys are released and the worker exits once nothing is open
+        wait_for(lambda: queue._worker is None)
+        self.assertEqual(queue._in_flight, {})
+
+    def test_analyze_entries_async_mode(self):
+        """Test async mode returns a job id whose result can be polled."""
+        self.mock_ai.return_value = {
+            "patterns": ["Async pattern"],
+            "insights": ["Async insight"],
+            "suggested_prompts": ["Async prompt"]
+        }
+
+        response = self.client.get('/analytics/analyze?mode=async')
+
+        self.assertEqual(response.status_code, 202)
+        job_id = self.get_response_data(response)['job_id']
+
+        # Jobs run inline in testing, so the result is ready immediately
+        response = self.client.get(f'/analytics/analyze/{job_id}')
+
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        self.assertEqual(data['results']['patterns'], ['Async pattern'])
+
+        response = self.client.get('/analytics/analyze/unknown-job')
+        self.assertEqual(response.status_code, 404)
+
     # === MOOD TRENDS TESTS ===
     
     def test_mood_trends_success(self):
@@ -329,28 +501,6 @@ class AnalyticsTestCase(TestCase):
         self.assertIn('date_range', data['trends'])
         self.assertEqual(data['trends']['date_range']['days'], 7)
     
-    def test_mood_trends_no_data(self):
-        """Test mood trends when user has no entries."""
-        # Remove all entries
-        Journal.query.filter_by(user_id=self.test_user.id).delete()
-        db.session.commit()
-        
-        response = self.client.get('/analytics/mood-trends')
-        
-        self.assertEqual(response.status_code, 200)
-        data = self.get_response_data(response)
-        
-        self.assertEqual(data['trends']['total_entries'], 0)
-        self.assertEqual(data['trends']['active_days'], 0)
-    
-    def test_mood_trends_invalid_parameters(self):
-        """Test mood trends with invalid parameters."""
-        response = self.client.get('/analytics/mood-trends?days=400')
-        
-        self.assertEqual(response.status_code, 400)
-        data = self.get_response_data(response)
-        self.assertIn('error', data)
-    
     # === ANALYTICS SUMMARY TESTS ===
     
     def test_analytics_summary_success(self):
@@ -370,28 +520,13 @@ class AnalyticsTestCase(TestCase):
         self.assertIn('most_active_day', summary)
         self.assertGreater(summary['total_entries'], 0)
     
-    def test_analytics_summary_no_data(self):
-        """Test analytics summary when user has no entries."""
-        # Remove all entries
-        Journal.query.filter_by(user_id=self.test_user.id).delete()
-        db.session.commit()
-        
-        response = self.client.get('/analytics/summary')
-        
-        self.assertEqual(response.status_code, 200)
-        data = self.get_response_data(response)
-        
-        summary = data['summary']
-        self.assertEqual(summary['total_entries'], 0)
-        self.assertEqual(summary['entries_this_month'], 0)
-        self.assertIsNone(summary['most_active_day'])
-    
     # === AUTHENTICATION AND SECURITY TESTS ===
     
     def test_analytics_requires_authentication(self):
         """Test that analytics endpoints require authentication."""
         # Logout user
-        self.client.post('/auth/logout')
+        with self.client.session_transaction() as sess:
+            sess.clear()
         
         endpoints = [
             '/analytics/analyze',
@@ -408,11 +543,10 @@ class AnalyticsTestCase(TestCase):
     def test_user_data_isolation(self):
         """Test that users can only access their own analytics."""
         # Create another user with entries
-        from werkzeug.security import generate_password_hash
         user2 = User(
             username='testuser2',
             email='test2@example.com',
-            password=generate_password_hash('testpassword2')
+            password=TEST_PASSWORD2_HASH
         )
         db.session.add(user2)
         db.session.flush()
@@ -428,30 +562,29 @@ class AnalyticsTestCase(TestCase):
         db.session.commit()
         
         # Current user's analytics should not include user2's data
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Pattern"],
-                "insights": ["Insight"],
-                "suggested_prompts": ["Prompt"]
-            }
-            
-            response = self.client.get('/analytics/analyze')
-            
-            self.assertEqual(response.status_code, 200)
-            data = self.get_response_data(response)
-            
-            # Should only analyze current user's entries
-            # (we created 6 entries for test_user, not including user2's entry)
-            self.assertEqual(data['entries_analyzed'], 5)  # 5 within 30 days
+        response = self.client.get('/analytics/analyze')
+        
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        
+        # Should only analyze current user's entries
+        # (we created 6 entries for test_user, not including user2's entry)
+        self.assertEqual(data['entries_analyzed'], 5)  # 5 within 30 days
     
     # === EDGE CASES AND ERROR HANDLING ===
     
     def test_analytics_with_deleted_entries(self):
         """Test analytics excludes soft-deleted entries."""
-        # Soft delete some entries
-        entries = Journal.query.filter_by(user_id=self.test_user.id).limit(2).all()
-        for entry in entries:
-            entry.deleted_at = datetime.now(timezone.utc)
+        # Soft delete some entries in one UPDATE
+        entry_ids = (
+            db.session.query(Journal.id)
+            .filter_by(user_id=self.test_user.id)
+            .limit(2)
+            .scalar_subquery()
+        )
+        Journal.query.filter(Journal.id.in_(entry_ids)).update(
+            {'deleted_at': self.now}, synchronize_session=False
+        )
         db.session.commit()
         
         response = self.client.get('/analytics/mood-trends')
@@ -474,32 +607,29 @@ class AnalyticsTestCase(TestCase):
         db.session.add(empty_entry)
         db.session.commit()
         
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Pattern"],
-                "insights": ["Insight"],
-                "suggested_prompts": ["Prompt"]
-            }
-            
-            response = self.client.get('/analytics/analyze')
-            
-            # Should handle gracefully (empty entries filtered out)
-            self.assertEqual(response.status_code, 200)
+        response = self.client.get('/analytics/analyze')
+        
+        # Should handle gracefully (empty entries filtered out)
+        self.assertEqual(response.status_code, 200)
     
     def test_analytics_date_range_validation(self):
-        """Test analytics date range validation."""
+        """Test analytics date range and entry limit validation."""
         test_cases = [
             ('/analytics/analyze?days=0', 400),
             ('/analytics/analyze?days=-5', 400),
             ('/analytics/analyze?days=366', 400),
+            ('/analytics/analyze?days=400', 400),
+            ('/analytics/analyze?max_entries=100', 400),
             ('/analytics/mood-trends?days=0', 400),
             ('/analytics/mood-trends?days=400', 400)
         ]
         
         for endpoint, expected_status in test_cases:
             with self.subTest(endpoint=endpoint):
+                self.reset_rate_limits()
                 response = self.client.get(endpoint)
                 self.assertEqual(response.status_code, expected_status)
+                self.assertIn('error', self.get_response_data(response))
     
     def test_analytics_malformed_parameters(self):
         """Test analytics with malformed parameters."""
@@ -517,8 +647,7 @@ class AnalyticsTestCase(TestCase):
     
     # === PRIVACY AND DATA SANITIZATION TESTS ===
     
-    @patch('backend.bp.analytics.call_ai_service')
-    def test_data_sanitization_for_ai(self, mock_ai_service):
+    def test_data_sanitization_for_ai(self):
         """Test that sensitive data is sanitized before sending to AI."""
         # Create entry with sensitive information
         sensitive_entry = Journal(
@@ -530,24 +659,15 @@ class AnalyticsTestCase(TestCase):
         db.session.add(sensitive_entry)
         db.session.commit()
         
-        mock_ai_service.return_value = {
-            "patterns": ["Pattern"],
-            "insights": ["Insight"],
-            "suggested_prompts": ["Prompt"]
-        }
-        
         response = self.client.get('/analytics/analyze')
         
         self.assertEqual(response.status_code, 200)
         
         # Check that AI service was called with sanitized data
-        self.assertTrue(mock_ai_service.called)
-        call_args = mock_ai_service.call_args[0]
+        self.assertTrue(self.mock_ai.called)
+        call_args = self.mock_ai.call_args[0]
         sanitized_content = call_args[0]  # First argument should be sanitized content
         
-        # Check what's actually in the sanitized content
-        print(f"Sanitized content: {sanitized_content}")
-        
         # Sensitive information should be replaced
         self.assertIn('[EMAIL]', sanitized_content)
         # Phone number pattern might be different - check what's actually there
@@ -562,7 +682,14 @@ class AnalyticsTestCase(TestCase):
         self.assertNotIn('john@example.com', sanitized_content)
         self.assertNotIn('123-45-6789', sanitized_content)
         self.assertNotIn('123 Main Street', sanitized_content)
-    
+
+    def test_remove_sensitive_info_parenthesized_phone(self):
+        """Test phone numbers with a parenthesized area code are replaced."""
+        from backend.utils.privacy import remove_sensitive_info
+
+        self.assertEqual(remove_sensitive_info("Call (555) 123-4567 today"), "Call [PHONE] today")
+        self.assertEqual(remove_sensitive_info("  Nothing sensitive here  "), "Nothing sensitive here")
+
     # === PERFORMANCE TESTS ===
     
     def test_analytics_performance_with_many_entries(self):
@@ -570,99 +697,27 @@ class AnalyticsTestCase(TestCase):
         # Create many entries (simulate heavy usage)
         import time
         
-        bulk_entries = []
-        for i in range(50):  # Create 50 additional entries
-            entry = Journal(
-                prompt=f"Bulk entry {i}",
-                answer=f"Bulk answer {i} with some content to analyze",
-                modality="text",
-                user_id=self.test_user.id,
-                created_at=datetime.now(timezone.utc) - timedelta(days=i % 30)
-            )
-            bulk_entries.append(entry)
-        
-        db.session.add_all(bulk_entries)
+        # The AI call is mocked, so 20 extra entries (one per day) cover the query path
+        timestamps = [self.now - timedelta(days=day) for day in range(20)]
+        db.session.execute(insert(Journal), [
+            {
+                "prompt": f"Bulk entry {i}",
+                "answer": f"Bulk answer {i} with some content to analyze",
+                "modality": "text",
+                "user_id": self.test_user.id,
+                "created_at": created_at
+            }
+            for i, created_at in enumerate(timestamps)
+        ])
         db.session.commit()
         
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": ["Pattern"],
-                "insights": ["Insight"],
-                "suggested_prompts": ["Prompt"]
-            }
-            
-            start_time = time.time()
-            response = self.client.get('/analytics/analyze')
-            end_time = time.time()
-            
-            # Should complete within reasonable time (< 5 seconds)
-            self.assertLess(end_time - start_time, 5.0)
-            self.assertEqual(response.status_code, 200)
-    
-    def test_phone_sanitization_debug(self):
-        """Debug test to check phone number sanitization."""
-        import re
-        
-        test_text = "My phone is 123-456-7890"
-        
-        # Test your regex patterns
-        pattern1 = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        pattern2 = r'\b\(\d{3}\)\s?\d{3}[-.]?\d{4}\b'
-        
-        result1 = re.sub(pattern1, '[PHONE]', test_text)
-        result2 = re.sub(pattern2, '[PHONE]', result1)
-        
-        print(f"Original: {test_text}")
-        print(f"After pattern1: {result1}")
-        print(f"After pattern2: {result2}")
-        
-        # This test always passes, it's just for debugging
-        self.assertTrue(True)
-    
-    def test_analytics_full_workflow(self):
-        """Test complete analytics workflow."""
-        with patch('backend.bp.analytics.call_ai_service') as mock_ai:
-            mock_ai.return_value = {
-                "patterns": [
-                    "You consistently reflect on learning and personal growth",
-                    "Gratitude appears frequently in your entries",
-                    "You actively engage with challenges and problem-solving"
-                ],
-                "insights": [
-                    "Your entries show a strong growth mindset",
-                    "You value continuous learning and self-improvement"
-                ],
-                "suggested_prompts": [
-                    "What new learning opportunity excites you most?",
-                    "How did you overcome a recent obstacle?",
-                    "What are you most grateful for this week?"
-                ]
-            }
-            
-            # 1. Get summary
-            summary_response = self.client.get('/analytics/summary')
-            self.assertEqual(summary_response.status_code, 200)
-            
-            # 2. Get trends
-            trends_response = self.client.get('/analytics/mood-trends')
-            self.assertEqual(trends_response.status_code, 200)
-            
-            # 3. Get AI analysis
-            analysis_response = self.client.get('/analytics/analyze')
-            self.assertEqual(analysis_response.status_code, 200)
-            
-            analysis_data = self.get_response_data(analysis_response)
-            
-            # Verify complete analysis structure
-            self.assertIn('results', analysis_data)
-            self.assertIn('entries_analyzed', analysis_data)
-            self.assertIn('date_range', analysis_data)
-            self.assertIn('analysis_timestamp', analysis_data)
-            
-            results = analysis_data['results']
-            self.assertEqual(len(results['patterns']), 3)
-            self.assertEqual(len(results['insights']), 2)
-            self.assertEqual(len(results['suggested_prompts']), 3)
+        start_time = time.time()
+        response = self.client.get('/analytics/analyze')
+        end_time = time.time()
+        
+        # Should complete within reasonable time (< 5 seconds)
+        self.assertLess(end_time - start_time, 5.0)
+        self.assertEqual(response.status_code, 200)
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -1,44 +1,44 @@
-import sys
-import os
-
-# Add project root to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
-
-# Now imports should work
-from flask_testing import TestCase
-import json
+from functools import lru_cache
+import orjson
 import unittest
-from werkzeug.security import check_password_hash
+from unittest.mock import patch
+from sqlalchemy import insert
+from werkzeug.security import check_password_hash, generate_password_hash
 
 from backend.models import User
-from backend.app import create_app, db
+from backend.app import db
+from tests.helpers import AppTestCase
+from backend.config import TestingConfig
+
+MULTIPLE_USERS = [
+    ('user1', 'user1@example.com', 'Password123'),
+    ('user2', 'user2@example.com', 'Password456'),
+    ('user3', 'user3@example.com', 'Password789'),
+]
+
+# Hashed once at import for tests that only need the users to exist
+MULTIPLE_USER_ROWS = [
+    {
+        'username': username,
+        'email': email,
+        'password': generate_password_hash(password, method=TestingConfig.PASSWORD_HASH_METHOD)
+    }
+    for username, email, password in MULTIPLE_USERS
+]
+
+@lru_cache(maxsize=None)
+def json_payload(**fields):
+    """Serialize a request body once per distinct set of fields."""
+    return orjson.dumps(fields)
 
-class AuthTestCase(TestCase):
+class AuthTestCase(AppTestCase):
     """Test suite for authentication features."""
     
-    def create_app(self):
-        """Create test app with isolated test configuration."""
-        return create_app('testing')
-    
-    def setUp(self):
-        """Set up fresh database for each test."""
-        db.create_all()
-    
-    def tearDown(self):
-        """Clean up after each test."""
-        db.session.remove()
-        db.drop_all()
-    
     def create_test_user(self, username='testuser', email='test@example.com', password='TestPassword123'):
         """Helper method to create test users."""
         response = self.client.post(
             '/auth/register',
-            data=json.dumps({
-                'username': username,
-                'email': email,
-                'password': password
-            }),
+            data=json_payload(username=username, email=email, password=password),
             content_type='application/json'
         )
         return response
@@ -47,16 +47,24 @@ class AuthTestCase(TestCase):
         """Helper method to login users."""
         return self.client.post(
             '/auth/login',
-            data=json.dumps({
-                'identifier': identifier,
-                'password': password
-            }),
+            data=json_payload(identifier=identifier, password=password),
             content_type='application/json'
         )
     
     def get_response_data(self, response):
         """Helper to decode JSON response."""
-        return json.loads(response.data.decode())
+        return orjson.loads(response.data)
+    
+    def assert_each_rejected(self, url, payloads, statuses=(400,)):
+        """Post every payload under one setUp and check each one's status."""
+        for payload in payloads:
+            with self.subTest(data=payload):
+                response = self.client.post(
+                    url,
+                    data=orjson.dumps(payload),
+                    content_type='application/json'
+                )
+                self.assertIn(response.status_code, statuses)
     
     # === REGISTRATION TESTS ===
     
@@ -103,20 +111,13 @@ class AuthTestCase(TestCase):
     def test_register_missing_fields(self):
         """Test registration with missing required fields."""
         test_cases = [
-            ({}, 'No data provided'),
-            ({'username': 'user'}, 'Missing required fields'),
-            ({'email': 'test@example.com'}, 'Missing required fields'),
-            ({'password': 'pass123'}, 'Missing required fields'),
+            {},  # No data provided
+            {'username': 'user'},  # Missing required fields
+            {'email': 'test@example.com'},
+            {'password': 'pass123'},
         ]
         
-        for data, expected_error_type in test_cases:
-            with self.subTest(data=data):
-                response = self.client.post(
-                    '/auth/register',
-                    data=json.dumps(data),
-                    content_type='application/json'
-                )
-                self.assertEqual(response.status_code, 400)
+        self.assert_each_rejected('/auth/register', test_cases)
     
     def test_register_invalid_data(self):
         """Test registration with invalid data formats."""
@@ -143,14 +144,7 @@ class AuthTestCase(TestCase):
             },
         ]
         
-        for data in test_cases:
-            with self.subTest(data=data):
-                response = self.client.post(
-                    '/auth/register',
-                    data=json.dumps(data),
-                    content_type='application/json'
-                )
-                self.assertEqual(response.status_code, 400)
+        self.assert_each_rejected('/auth/register', test_cases)
     
     def test_register_no_json_data(self):
         """Test registration with no JSON data."""
@@ -166,7 +160,8 @@ class AuthTestCase(TestCase):
         
         # Password should be hashed, not stored in plain text
         self.assertNotEqual(user.password, password)
-        self.assertTrue(len(user.password) > 50)  # Hashed passwords are long
+        # Stored under the configured method, whatever its cost
+        self.assertTrue(user.password.startswith(self.app.config['PASSWORD_HASH_METHOD'] + '$'))
         
         # Verify the hash is valid
         self.assertTrue(check_password_hash(user.password, password))
@@ -224,6 +219,20 @@ class AuthTestCase(TestCase):
         data = self.get_response_data(response)
         self.assertEqual(data['error'], 'Invalid credentials')
     
+    def test_login_unknown_user_dummy_hash(self):
+        """Test unknown users are checked against a dummy hash using the configured method."""
+        from backend.bp.auth import get_dummy_password_hash
+        
+        with patch('backend.bp.auth.check_password_hash', wraps=check_password_hash) as mock_check:
+            response = self.login_user(identifier='nonexistentuser', password='SomePassword1')
+        self.assertEqual(response.status_code, 401)
+        
+        # The timing defense stays on under testing; it is cheap because the
+        # configured method is a single PBKDF2 iteration
+        dummy_hash = get_dummy_password_hash(self.app.config['PASSWORD_HASH_METHOD'])
+        self.assertTrue(dummy_hash.startswith(self.app.config['PASSWORD_HASH_METHOD'] + '$'))
+        mock_check.assert_called_once_with(dummy_hash, 'SomePassword1')
+    
     def test_login_missing_fields(self):
         """Test login with missing fields."""
         test_cases = [
@@ -232,14 +241,7 @@ class AuthTestCase(TestCase):
             {'password': 'pass'},  # Missing identifier
         ]
         
-        for data in test_cases:
-            with self.subTest(data=data):
-                response = self.client.post(
-                    '/auth/login',
-                    data=json.dumps(data),
-                    content_type='application/json'
-                )
-                self.assertEqual(response.status_code, 400)
+        self.assert_each_rejected('/auth/login', test_cases)
     
     def test_login_empty_fields(self):
         """Test login with empty fields."""
@@ -249,14 +251,7 @@ class AuthTestCase(TestCase):
             {'identifier': '', 'password': ''},
         ]
         
-        for data in test_cases:
-            with self.subTest(data=data):
-                response = self.client.post(
-                    '/auth/login',
-                    data=json.dumps(data),
-                    content_type='application/json'
-                )
-                self.assertEqual(response.status_code, 400)
+        self.assert_each_rejected('/auth/login', test_cases)
     
     def test_login_no_json_data(self):
         """Test login with no JSON data."""
@@ -306,28 +301,27 @@ class AuthTestCase(TestCase):
         self.assertIn(logout_response2.status_code, [302, 401])
     
     def test_multiple_users(self):
-        """Test creating and managing multiple users."""
-        users = [
-            ('user1', 'user1@example.com', 'Password123'),
-            ('user2', 'user2@example.com', 'Password456'),
-            ('user3', 'user3@example.com', 'Password789'),
-        ]
-        
+        """Test registering multiple users."""
         # Create all users
-        for username, email, password in users:
+        for username, email, password in MULTIPLE_USERS:
             response = self.create_test_user(username, email, password)
             self.assertEqual(response.status_code, 201)
         
         # Verify all users exist in database
-        for username, email, password in users:
+        for username, email, password in MULTIPLE_USERS:
             user = User.query.filter_by(username=username).first()
             self.assertIsNotNone(user)
             self.assertEqual(user.email, email)
+    
+    def test_login_multiple_users(self):
+        """Test each of several existing users can log in."""
+        db.session.execute(insert(User), MULTIPLE_USER_ROWS)
+        db.session.commit()
         
-        # Test login for each user
-        for username, email, password in users:
-            response = self.login_user(username, password)
-            self.assertEqual(response.status_code, 200)
+        for username, email, password in MULTIPLE_USERS:
+            with self.subTest(username=username):
+                response = self.login_user(username, password)
+                self.assertEqual(response.status_code, 200)
     
     def test_user_streak_initialization(self):
         """Test that new users have correct initial streak values."""
@@ -361,11 +355,12 @@ class AuthTestCase(TestCase):
             "' UNION SELECT * FROM users --",
         ]
         
-        for malicious_input in malicious_inputs:
-            with self.subTest(input=malicious_input):
-                response = self.login_user(identifier=malicious_input, password='password')
-                # Should not cause server error (500), should return 401
-                self.assertIn(response.status_code, [400, 401])
+        # Should not cause server error (500), should return 401
+        self.assert_each_rejected(
+            '/auth/login',
+            [{'identifier': malicious_input, 'password': 'password'} for malicious_input in malicious_inputs],
+            statuses=(400, 401)
+        )
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
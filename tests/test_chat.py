@@ -1,12 +1,20 @@
 """
 Gemini API Test Script
 A standalone script to test Gemini API functionality with minimal setup.
+
+Run directly for live checks against the API. Under the test runner the same
+checks run against a fake model, unless GEMINI_LIVE_TESTS=1 is set.
 """
 
+import asyncio
 import os
 import sys
 import json
+import unittest
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 import google.generativeai as genai
 
 
@@ -31,7 +39,18 @@ def load_environment():
     return api_key
 
 
-def test_basic_api_connection(api_key):
+@lru_cache(maxsize=None)
+def get_model(system_instruction=None):
+    """Return one shared model per system instruction."""
+    if system_instruction is None:
+        return genai.GenerativeModel(model_name="gemini-2.0-flash")
+    return genai.GenerativeModel(
+        model_name="gemini-2.0-flash",
+        system_instruction=system_instruction
+    )
+
+
+def check_basic_api_connection(api_key):
     """Test basic API connection and model initialization."""
     print("🔧 Testing basic API connection...")
     
@@ -40,7 +59,7 @@ def test_basic_api_connection(api_key):
         print("✅ API configured successfully")
         
         # Test model creation
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash")
+        model = get_model()
         print("✅ Model created successfully")
         
         return model
@@ -49,123 +68,89 @@ def test_basic_api_connection(api_key):
         return None
 
 
-def test_simple_generation(model):
-    """Test simple text generation."""
-    print("\n🧪 Testing simple text generation...")
-    
-    try:
-        response = model.generate_content("Hello! Please respond with a short greeting.")
-        
-        if response and response.text:
-            print(f"✅ Simple generation successful:")
-            print(f"Response: {response.text.strip()}")
-            return True
-        else:
-            print("❌ No response text received")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Simple generation failed: {e}")
-        return False
+# (name, system instruction, contents, generation config)
+GENERATION_CHECKS = [
+    ("Simple Generation", None, "Hello! Please respond with a short greeting.", None),
+    (
+        "System Instruction",
+        "You are Kai, a compassionate journaling companion. "
+        "Keep responses brief and supportive, under 50 words for this test.",
+        "I'm feeling a bit stressed today.",
+        None
+    ),
+    (
+        "Conversation History",
+        "You are a helpful assistant. Keep responses brief.",
+        [
+            {"role": "user", "parts": ["What's 2+2?"]},
+            {"role": "model", "parts": ["2+2 equals 4."]},
+            {"role": "user", "parts": ["What about 3+3?"]}
+        ],
+        None
+    ),
+    (
+        "Generation Config",
+        None,
+        "Tell me a very short joke.",
+        {"temperature": 0.7, "max_output_tokens": 100, "top_p": 0.8}
+    ),
+]
 
 
-def test_with_system_instruction(api_key):
-    """Test with system instruction (similar to your chat app)."""
-    print("\n🎭 Testing with system instruction...")
+def report_generation(name, response):
+    """Print the outcome of a generation check and return whether it passed."""
+    if response and response.text:
+        print(f"✅ {name} test successful:")
+        print(f"Response: {response.text.strip()}")
+        return True
     
-    try:
-        system_instruction = (
-            "You are Kai, a compassionate journaling companion. "
-            "Keep responses brief and supportive, under 50 words for this test."
-        )
-        
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction=system_instruction
-        )
-        
-        response = model.generate_content("I'm feeling a bit stressed today.")
-        
-        if response and response.text:
-            print(f"✅ System instruction test successful:")
-            print(f"Response: {response.text.strip()}")
-            return True
-        else:
-            print("❌ No response with system instruction")
-            return False
-            
-    except Exception as e:
-        print(f"❌ System instruction test failed: {e}")
-        return False
+    print(f"❌ No response text received for {name.lower()}")
+    return False
 
 
-def test_conversation_history():
-    """Test conversation with history (similar to your chat flow)."""
-    print("\n💬 Testing conversation with history...")
+def generation_options(generation_config):
+    """Keyword arguments for generate_content, omitting an unset config."""
+    return {"generation_config": generation_config} if generation_config else {}
+
+
+def check_generation(name, system_instruction, contents, generation_config):
+    """Run one generation check and report whether it produced text."""
+    print(f"\n🧪 Testing {name.lower()}...")
     
     try:
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction="You are a helpful assistant. Keep responses brief."
-        )
-        
-        # Simulate conversation history
-        conversation_history = [
-            {"role": "user", "parts": ["What's 2+2?"]},
-            {"role": "model", "parts": ["2+2 equals 4."]},
-            {"role": "user", "parts": ["What about 3+3?"]}
-        ]
-        
-        response = model.generate_content(conversation_history)
-        
-        if response and response.text:
-            print(f"✅ Conversation history test successful:")
-            print(f"Response: {response.text.strip()}")
-            return True
-        else:
-            print("❌ No response with conversation history")
-            return False
-            
+        model = get_model(system_instruction)
+        response = model.generate_content(contents, **generation_options(generation_config))
     except Exception as e:
-        print(f"❌ Conversation history test failed: {e}")
+        print(f"❌ {name} test failed: {e}")
         return False
+    
+    return report_generation(name, response)
 
 
-def test_generation_config():
-    """Test with generation configuration (similar to your settings)."""
-    print("\n⚙️ Testing with generation config...")
-    
+async def check_generation_async(name, system_instruction, contents, generation_config):
+    """Async variant of check_generation, so checks can wait on the API together."""
     try:
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-        
-        response = model.generate_content(
-            "Tell me a very short joke.",
-            generation_config={
-                "temperature": 0.7,
-                "max_output_tokens": 100,
-                "top_p": 0.8
-            }
-        )
-        
-        if response and response.text:
-            print(f"✅ Generation config test successful:")
-            print(f"Response: {response.text.strip()}")
-            return True
-        else:
-            print("❌ No response with generation config")
-            return False
-            
+        model = get_model(system_instruction)
+        response = await model.generate_content_async(contents, **generation_options(generation_config))
     except Exception as e:
-        print(f"❌ Generation config test failed: {e}")
+        print(f"❌ {name} test failed: {e}")
         return False
+    
+    return report_generation(name, response)
+
 
+async def run_generation_checks():
+    """Run every generation check concurrently; total time is the slowest call."""
+    print("\n🧪 Testing " + ", ".join(check[0].lower() for check in GENERATION_CHECKS) + " concurrently...")
+    return await asyncio.gather(*(check_generation_async(*check) for check in GENERATION_CHECKS))
 
-def test_error_handling():
+
+def check_error_handling():
     """Test error handling scenarios."""
     print("\n🚨 Testing error handling...")
     
     try:
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash")
+        model = get_model()
         
         # Test with potentially problematic content
         response = model.generate_content("")
@@ -181,8 +166,62 @@ def test_error_handling():
     return True
 
 
-def run_all_tests():
-    """Run comprehensive API tests."""
+class GeminiChecksTestCase(unittest.TestCase):
+    """Run the script's checks without network calls by default."""
+    
+    def setUp(self):
+        """Swap in a fake model unless live checks were requested."""
+        self.live = os.getenv('GEMINI_LIVE_TESTS') == '1'
+        # Models are cached across checks; start each test with a fresh one
+        get_model.cache_clear()
+        if self.live:
+            self.api_key = load_environment()
+            genai.configure(api_key=self.api_key)
+            return
+        
+        self.api_key = 'test-key'
+        self.model = MagicMock()
+        self.model.generate_content.return_value = SimpleNamespace(text='Hello there.')
+        self.model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text='Hello there.'))
+        
+        # Direct attribute swap, restored in tearDown
+        self.real_genai = (genai.configure, genai.GenerativeModel)
+        genai.configure = MagicMock()
+        genai.GenerativeModel = MagicMock(return_value=self.model)
+    
+    def tearDown(self):
+        if not self.live:
+            genai.configure, genai.GenerativeModel = self.real_genai
+    
+    def test_basic_connection(self):
+        self.assertIsNotNone(check_basic_api_connection(self.api_key))
+    
+    def test_generation_checks(self):
+        for name, system_instruction, contents, generation_config in GENERATION_CHECKS:
+            with self.subTest(check=name):
+                self.assertTrue(check_generation(name, system_instruction, contents, generation_config))
+        
+        if not self.live:
+            # One model per distinct system instruction
+            self.assertEqual(genai.GenerativeModel.call_count, 3)
+            history_call, config_call = self.model.generate_content.call_args_list[2:]
+            self.assertEqual([turn['role'] for turn in history_call.args[0]], ['user', 'model', 'user'])
+            self.assertIn('generation_config', config_call.kwargs)
+    
+    def test_generation_checks_concurrent(self):
+        results = asyncio.run(run_generation_checks())
+        self.assertEqual(results, [True] * len(GENERATION_CHECKS))
+        if not self.live:
+            self.assertEqual(self.model.generate_content_async.await_count, len(GENERATION_CHECKS))
+    
+    def test_error_handling(self):
+        if not self.live:
+            self.model.generate_content.side_effect = ValueError("contents must not be empty")
+        self.assertTrue(check_error_handling())
+
+
+def run_all_tests(sequential=False):
+    """Run comprehensive API tests (generation checks concurrently unless sequential)."""
     print("🚀 Starting Gemini API Tests")
     print("=" * 50)
     
@@ -192,27 +231,22 @@ def run_all_tests():
     test_results = []
     
     # Test 1: Basic connection
-    model = test_basic_api_connection(api_key)
+    model = check_basic_api_connection(api_key)
     test_results.append(("Basic Connection", model is not None))
     
     if not model:
         print("\n❌ Cannot proceed with other tests - basic connection failed")
         return
     
-    # Test 2: Simple generation
-    test_results.append(("Simple Generation", test_simple_generation(model)))
-    
-    # Test 3: System instruction
-    test_results.append(("System Instruction", test_with_system_instruction(api_key)))
-    
-    # Test 4: Conversation history
-    test_results.append(("Conversation History", test_conversation_history()))
-    
-    # Test 5: Generation config
-    test_results.append(("Generation Config", test_generation_config()))
+    # Tests 2-5: Generation checks
+    if sequential:
+        results = [check_generation(*check) for check in GENERATION_CHECKS]
+    else:
+        results = asyncio.run(run_generation_checks())
+    test_results.extend(zip((check[0] for check in GENERATION_CHECKS), results))
     
     # Test 6: Error handling
-    test_results.append(("Error Handling", test_error_handling()))
+    test_results.append(("Error Handling", check_error_handling()))
     
     # Results summary
     print("\n" + "=" * 50)
@@ -246,10 +280,7 @@ def interactive_test():
     try:
         api_key = load_environment()
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction="You are a helpful assistant."
-        )
+        model = get_model("You are a helpful assistant.")
         
         while True:
             user_input = input("\nYou: ").strip()
@@ -276,7 +307,7 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "interactive":
         interactive_test()
     else:
-        run_all_tests()
+        run_all_tests(sequential="--sequential" in sys.argv)
         
         # Offer interactive mode
         response = input("\n🤔 Would you like to try interactive mode? (y/n): ").strip().lower()
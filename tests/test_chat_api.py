@@ -0,0 +1,272 @@
+import os
+import unittest
+import orjson
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from werkzeug.security import generate_password_hash
+from backend.models import User, Conversation, ChatMessage
+from backend.app import db
+from backend.bp.chat import sanitize_journal_content_for_ai, strip_html
+from tests.helpers import AppTestCase
+
+REPLY_TEXT = "That sounds like a meaningful day. What stood out most?"
+
+def fake_response(text):
+    """Build a non-streamed Gemini response carrying text."""
+    return SimpleNamespace(
+        prompt_feedback=None,
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=[text]))],
+        text=text
+    )
+
+def fake_stream(*texts, error=None):
+    """Yield streamed Gemini chunks, then raise error if one is given."""
+    for text in texts:
+        yield SimpleNamespace(text=text)
+    if error is not None:
+        raise error
+
+class ChatEndpointTestCase(AppTestCase):
+    """Test suite for the chat endpoints, with the Gemini model mocked."""
+
+    @classmethod
+    def seed_database(cls):
+        """Create the test user once for the whole class."""
+        user = User(
+            username='chatuser',
+            email='chat@example.com',
+            password=generate_password_hash('testpassword', method=cls.app.config['PASSWORD_HASH_METHOD'])
+        )
+        db.session.add(user)
+        db.session.commit()
+        cls.test_user_id = user.id
+
+    def setUp(self):
+        """Log the test user in and swap in a mock chat model."""
+        super().setUp()
+        self.login(self.test_user_id)
+
+        self.model = MagicMock()
+        self.model.generate_content.return_value = fake_response(REPLY_TEXT)
+        for patcher in (
+            patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'}),
+            patch('backend.bp.chat.get_chat_model', return_value=self.model)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_response_data(self, response):
+        """Helper to decode JSON response."""
+        return orjson.loads(response.data)
+
+    def post_message(self, message, conversation_id=None, stream=False):
+        """Helper to send one chat message."""
+        payload = {'message': message, 'stream': stream}
+        if conversation_id is not None:
+            payload['conversation_id'] = conversation_id
+        return self.client.post('/chat/message', json=payload)
+
+    def stream_lines(self, response):
+        """Decode every NDJSON line of a streamed response."""
+        return [orjson.loads(line) for line in response.data.splitlines() if line.strip()]
+
+    def saved_messages(self, conversation_id):
+        """Return the (role, content) pairs stored for a conversation."""
+        return db.session.query(ChatMessage.role, ChatMessage.content) \
+                         .filter_by(conversation_id=conversation_id) \
+                         .order_by(ChatMessage.id).all()
+
+    # === MESSAGE TESTS ===
+
+    def test_new_conversation(self):
+        """Test the first message creates a conversation with both messages and its summary."""
+        response = self.post_message("Today I finished my first marathon")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        data = self.get_response_data(response)
+        self.assertEqual(data['ai_message'], REPLY_TEXT)
+        self.assertTrue(data['is_new_conversation'])
+
+        conversation = db.session.get(Conversation, data['conversation_id'])
+        self.assertEqual(conversation.user_id, self.test_user_id)
+        self.assertEqual(conversation.title, "Today I finished my first marathon")
+        self.assertEqual(conversation.message_count, 2)
+        self.assertEqual(conversation.last_message_preview, REPLY_TEXT)
+        self.assertEqual(self.saved_messages(conversation.id), [
+            ("user", "Today I finished my first marathon"),
+            ("model", REPLY_TEXT)
+        ])
+
+    def test_follow_up_message(self):
+        """Test a follow-up sends the earlier turn as history and appends to the conversation."""
+        conversation_id = self.get_response_data(self.post_message("First message"))['conversation_id']
+
+        self.model.generate_content.return_value = fake_response("Second reply " + "x" * 80)
+        response = self.post_message("Second message", conversation_id=conversation_id)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(self.get_response_data(response)['is_new_conversation'])
+
+        contents = self.model.generate_content.call_args[0][0]
+        self.assertEqual(contents, [
+            {"role": "user", "parts": ["First message"]},
+            {"role": "model", "parts": [REPLY_TEXT]},
+            {"role": "user", "parts": ["Second message"]}
+        ])
+
+        conversation = db.session.get(Conversation, conversation_id)
+        self.assertEqual(conversation.message_count, 4)
+        self.assertEqual(conversation.last_message_preview, "Second reply " + "x" * 47 + "...")
+        self.assertEqual(len(self.saved_messages(conversation_id)), 4)
+
+    def test_follow_up_unknown_conversation(self):
+        """Test messages to a missing conversation are rejected."""
+        response = self.post_message("Hello", conversation_id=99999)
+        self.assertEqual(response.status_code, 404)
+        self.model.generate_content.assert_not_called()
+
+    # === STREAMING TESTS ===
+
+    def test_streamed_message(self):
+        """Test a streamed reply arrives as NDJSON deltas and is saved once complete."""
+        self.model.generate_content.return_value = fake_stream("Hello ", "there")
+
+        response = self.post_message("Stream please", stream=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = self.stream_lines(response)
+        self.assertEqual(lines[:2], [{"delta": "Hello "}, {"delta": "there"}])
+        self.assertTrue(lines[-1]['done'])
+        self.assertTrue(lines[-1]['is_new_conversation'])
+
+        self.assertEqual(self.saved_messages(lines[-1]['conversation_id']), [
+            ("user", "Stream please"),
+            ("model", "Hello there")
+        ])
+
+    def test_streamed_message_interrupted(self):
+        """Test a stream failing midway ends with an error line and saves nothing."""
+        self.model.generate_content.return_value = fake_stream("Partial", error=RuntimeError("quota exceeded"))
+
+        response = self.post_message("Stream please", stream=True)
+
+        lines = self.stream_lines(response)
+        self.assertEqual(lines[0], {"delta": "Partial"})
+        self.assertIn("high demand", lines[-1]['error'])
+        self.assertNotIn('done', lines[-1])
+        self.assertEqual(Conversation.query.count(), 0)
+        self.assertEqual(ChatMessage.query.count(), 0)
+
+    def test_streamed_message_save_failure(self):
+        """Test a failure saving the streamed turn is reported as the last line."""
+        self.model.generate_content.return_value = fake_stream("Complete reply")
+
+        # The body is generated while it is read, so read it inside the patch
+        with patch('backend.bp.chat.save_chat_turn', side_effect=RuntimeError("database is locked")):
+            lines = self.stream_lines(self.post_message("Stream please", stream=True))
+
+        self.assertEqual(lines[0], {"delta": "Complete reply"})
+        self.assertEqual(lines[-1], {"error": "Failed to process message. Please try again."})
+
+    # === HISTORY TESTS ===
+
+    def test_conversation_history(self):
+        """Test the history endpoint returns every message in order."""
+        conversation_id = self.get_response_data(self.post_message("First message"))['conversation_id']
+        self.post_message("Second message", conversation_id=conversation_id)
+
+        response = self.client.get(f'/chat/conversations/{conversation_id}')
+
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        self.assertEqual(data['title'], "First message")
+        self.assertEqual(data['message_count'], 4)
+        self.assertEqual([message['role'] for message in data['history']], ["user", "model", "user", "model"])
+        self.assertEqual(data['history'][2], {"role": "user", "parts": ["Second message"]})
+
+    def test_conversation_list(self):
+        """Test conversations are listed from their summary columns with has_next paging."""
+        for i in range(3):
+            self.post_message(f"Conversation number {i}")
+
+        response = self.client.get('/chat/conversations?per_page=2')
+
+        self.assertEqual(response.status_code, 200)
+        data = self.get_response_data(response)
+        self.assertEqual(len(data['conversations']), 2)
+        self.assertEqual(data['pagination'], {
+            "current_page": 1,
+            "per_page": 2,
+            "has_next": True,
+            "has_prev": False
+        })
+        first = data['conversations'][0]
+        self.assertEqual(first['message_count'], 2)
+        self.assertEqual(first['last_message_preview'], REPLY_TEXT)
+
+        data = self.get_response_data(self.client.get('/chat/conversations?per_page=2&page=2'))
+        self.assertEqual(len(data['conversations']), 1)
+        self.assertFalse(data['pagination']['has_next'])
+        self.assertTrue(data['pagination']['has_prev'])
+
+    def test_deleted_conversation_hidden(self):
+        """Test soft-deleted conversations leave the list and history."""
+        conversation_id = self.get_response_data(self.post_message("To be deleted"))['conversation_id']
+
+        self.assertEqual(self.client.delete(f'/chat/conversations/{conversation_id}').status_code, 200)
+
+        data = self.get_response_data(self.client.get('/chat/conversations'))
+        self.assertEqual(data['conversations'], [])
+        self.assertEqual(self.client.get(f'/chat/conversations/{conversation_id}').status_code, 404)
+
+class ChatSanitizeTestCase(unittest.TestCase):
+    """Test the privacy scrubbing applied to journal context sent to the model."""
+
+    def test_sensitive_info_near_cut_is_scrubbed(self):
+        """Test values pulled under max_length by shorter placeholders are still scrubbed."""
+        emails = " ".join(f"someone.with.a.long.name{i}@example-domain.com" for i in range(4))
+        text = f"{emails} {'y' * 11} 4111 1111 1111 1111 or 555-123-4567 and more text"
+
+        result = sanitize_journal_content_for_ai(text, max_length=150)
+
+        self.assertEqual(result, "[EMAIL] [EMAIL] [EMAIL] [EMAIL] yyyyyyyyyyy [CARD] or [PHONE] and more text")
+        self.assertNotIn("555", result)
+
+    def test_many_emails_leave_no_fragment(self):
+        """Test a run of long emails never leaves part of one in the result."""
+        text = " ".join(f"someone.with.a.long.name{i}@example-domain.com" for i in range(6))
+
+        result = sanitize_journal_content_for_ai(text, max_length=40)
+
+        self.assertNotIn("@", result)
+        self.assertNotIn("example-domain", result)
+        self.assertEqual(result, "[EMAIL] [EMAIL] [EMAIL] [EMAIL] [EMAIL]")
+
+class StripHtmlTestCase(unittest.TestCase):
+    """Test the HTML stripping applied to chat messages and titles."""
+
+    def test_tags_stripped(self):
+        """Test tags are removed and their text kept."""
+        self.assertEqual(strip_html('<b>bold</b> and <a href="x">link</a>'), 'bold and link')
+
+    def test_comments_stripped(self):
+        """Test HTML comments are removed rather than escaped into the message."""
+        self.assertEqual(strip_html('hi <!-- secret --> there'), 'hi  there')
+
+    def test_entities_not_double_escaped(self):
+        """Test existing entities are kept and bare ampersands escaped."""
+        self.assertEqual(strip_html('fish &amp; chips & peas'), 'fish &amp; chips &amp; peas')
+
+    def test_bare_angle_brackets_escaped(self):
+        """Test angle brackets that are not tags are escaped, not dropped."""
+        self.assertEqual(strip_html('a < b > c'), 'a &lt; b &gt; c')
+        self.assertEqual(strip_html('I <3 you'), 'I &lt;3 you')
+
+    def test_plain_text_unchanged(self):
+        """Test text without markup comes back as is, quotes included."""
+        self.assertEqual(strip_html('it\'s "fine"'), 'it\'s "fine"')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+import importlib.util
+import json
+import os
+import unittest
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'versions')
+
+def load_migration(filename):
+    """Import one revision module from migrations/versions."""
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+INITIAL = load_migration('3af1ea126311_initial_schema.py')
+DENORMALIZE_SUMMARY = load_migration('e2b64930629c_denormalize_conversation_summary.py')
+SPLIT_MESSAGES = load_migration('e83d0cb46ade_move_chat_messages_into_their_own_table.py')
+
+CHAT_BLOB = [
+    {"role": "user", "parts": ["How do I keep journaling every day?"]},
+    {"role": "model", "parts": ["Start small: one sentence a day counts."]},
+    {"role": "user", "parts": ["Thanks!"]},
+    {"role": "model", "parts": ["You're welcome."]}
+]
+
+class ChatMigrationTestCase(unittest.TestCase):
+    """Test the chat summary and chat message migrations on a conversation with a chat blob."""
+
+    def setUp(self):
+        """Build the initial schema with one user and conversation in an in-memory database."""
+        self.engine = sa.create_engine('sqlite://')
+        self.connection = self.engine.connect()
+        self.created_at = datetime(2026, 1, 2, 3, 4, 5)
+
+        self.run_migration(INITIAL.upgrade)
+        self.connection.exec_driver_sql(
+            "INSERT INTO user (id, username, email, password, last_activity_date, current_streak, "
+            "longest_streak, created_at, updated_at) VALUES (1, 'u', 'u@example.com', 'x', ?, 0, 0, ?, ?)",
+            (self.created_at, self.created_at, self.created_at)
+        )
+        self.connection.exec_driver_sql(
+            "INSERT INTO conversation (id, chat, user_id, created_at, updated_at) VALUES (1, ?, 1, ?, ?)",
+            (json.dumps(CHAT_BLOB), self.created_at, self.created_at)
+        )
+        self.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+        self.engine.dispose()
+
+    def run_migration(self, step):
+        """Run one upgrade() or downgrade() against the test connection."""
+        with Operations.context(MigrationContext.configure(self.connection)):
+            step()
+        self.connection.commit()
+
+    def columns(self, table):
+        """Return the column names of a table."""
+        return {column['name'] for column in sa.inspect(self.connection).get_columns(table)}
+
+    def test_summary_backfill(self):
+        """Test the denormalized summary columns are filled from the chat blob."""
+        self.run_migration(DENORMALIZE_SUMMARY.upgrade)
+
+        count, preview = self.connection.exec_driver_sql(
+            "SELECT message_count, last_message_preview FROM conversation WHERE id = 1"
+        ).one()
+        self.assertEqual(count, len(CHAT_BLOB))
+        self.assertEqual(preview, "You're welcome.")
+
+    def test_messages_moved_and_restored(self):
+        """Test upgrading moves the blob into chatmessage rows and downgrading rebuilds it."""
+        self.run_migration(DENORMALIZE_SUMMARY.upgrade)
+        self.run_migration(SPLIT_MESSAGES.upgrade)
+
+        self.assertNotIn('chat', self.columns('conversation'))
+        rows = self.connection.exec_driver_sql(
+            "SELECT conversation_id, role, content, created_at FROM chatmessage ORDER BY id"
+        ).all()
+        self.assertEqual(
+            [(row.role, row.content) for row in rows],
+            [(message["role"], message["parts"][0]) for message in CHAT_BLOB]
+        )
+        self.assertTrue(all(row.conversation_id == 1 for row in rows))
+        self.assertIn(
+            ['conversation_id', 'id'],
+            [index['column_names'] for index in sa.inspect(self.connection).get_indexes('chatmessage')]
+        )
+
+        self.run_migration(SPLIT_MESSAGES.downgrade)
+
+        self.assertNotIn('chatmessage', sa.inspect(self.connection).get_table_names())
+        chat = self.connection.exec_driver_sql("SELECT chat FROM conversation WHERE id = 1").scalar_one()
+        self.assertEqual(json.loads(chat), CHAT_BLOB)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)